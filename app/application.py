@@ -0,0 +1,669 @@
+# Author: Marek Jankech
+# Copyright Marek Jankech 2022 Released under the MIT license
+
+import app.boot as boot
+from machine import Pin
+from lib.ir_rx.nec import NEC_8  # NEC remote, 8 bit addresses
+from app.mx_data import MxDate, MxTime, MxScore, MxBrightness
+from app.hw import display, nv_mem, print_i2c_devices
+from app.input import InputQueue
+from app.sched import Scheduler, PRIO_INPUT
+from app.state import State, StateMachine
+from app.view import BasicViewer, SettingsViewer
+from app.worker import FrameWorker
+from app.mx_data import MxUseScoreCfg, MxUseDateCfg, MxUseTimeCfg, MxUseTemperatureCfg, MxUseScrollingCfg
+
+import uasyncio as asyncio
+import app.constants as const
+import app.hw as hw
+
+import utime
+import gc
+
+class App:
+	HOLD_BTN_RPT_THRESHOLD = 6
+
+	# Buttons, which are repeated when held
+	REPEATABLE_BUTTONS = (const.BUTTON_UP, const.BUTTON_DOWN,
+		const.BUTTON_0, const.BUTTON_OK)
+
+	# States
+	BASIC = 0
+	LEFT_SCORE = 1
+	RIGHT_SCORE = 2
+	SCORE_CFG = 3
+	DATE_CFG = 4
+	TIME_CFG = 5
+	TEMPERATURE_CFG = 6
+	SCROLLING_CFG = 7
+	DAY = 8
+	MONTH = 9
+	YEAR = 10
+	HOUR = 11
+	MINUTE = 12
+	BRIGHTNESS = 13
+	SCORE_RESET = 14
+	REVERT_SCORE = 15
+	EXPORT_LOG = 16
+	EXIT = 17
+
+	def __init__(self):
+		"""
+		Main application.
+		Evaluates user inputs from remote control and performs appropriate
+		actions on matrix display.
+		It uses asynchronous tasks execution (cooperative multitasking)
+		to pretend parallelism.
+		"""
+
+		# Pulsed after every dispatched button
+		self._input_event = asyncio.Event()
+		self._exit_flag = asyncio.ThreadSafeFlag()
+
+		self.brightness_changed = False
+		self.display_on = True
+
+		self.reset_score_cnt = 0
+		self.revert_score_cnt = 0
+		self.exit_cnt = 0
+
+		self.display = display
+
+		# The persisted score is the first frame, shown before the rest
+		# of the HW and of the application is set up
+		self.mx_score = MxScore()
+		self.mx_score.render()
+		boot.mark("first frame")
+
+		hw.init_peripherals()
+		self.mx_score.open_journal()
+
+		# Buttons pushed on the remote control, dispatched by input_operation
+		self.input_queue = InputQueue()
+		recv_pin = Pin(const.RECV_PIN, Pin.IN)
+		# Set button_handler as remote control IRQ handler
+		self.receiver = NEC_8(recv_pin, self.button_handler)
+
+		# Input is dispatched before the next slice of the rendering,
+		# its wait is the time from the button push to the dispatch
+		self.scheduler = Scheduler()
+		self.scheduler.set_input_source(lambda: len(self.input_queue) > 0)
+		self._input_slice = self.scheduler.register("input", PRIO_INPUT, 0,
+			const.INPUT_LATENCY_TARGET_MS)
+
+		# Count ticks for measuring period between button pushes
+		self.ticks = utime.ticks_ms()
+
+		# Info renderable on the matrix
+		self.mx_bright = MxBrightness()
+		self.mx_date = MxDate()
+		self.mx_time = MxTime()
+
+		self.basic_viewer = BasicViewer(self.mx_score)
+		# The settings are created on the first use, see _cfg_state
+		self._settings_viewer = None
+
+		self.machine = StateMachine(self._build_states(), self.BASIC)
+		boot.mark("app")
+
+	def _build_states(self) -> dict:
+		"""
+		Transitions and key bindings of all the states.
+		"""
+
+		states = (
+			State(self.BASIC, self._keys({
+				const.BUTTON_0: self.hold_btn_0,
+				const.BUTTON_1: self.start_export_log,
+				const.BUTTON_3: self.start_score_cfg,
+				const.BUTTON_4: self.start_date_cfg,
+				const.BUTTON_5: self.start_time_cfg,
+				const.BUTTON_6: self.start_temperature_cfg,
+				const.BUTTON_7: self.start_scrolling_cfg,
+				const.BUTTON_8: self.start_date_time,
+				const.BUTTON_9: self.start_brightness,
+				const.BUTTON_LEFT: self.start_left_score,
+				const.BUTTON_RIGHT: self.start_right_score,
+				const.BUTTON_DOWN: self.hold_btn_down,
+				const.BUTTON_OK: self.hold_btn_ok}),
+				tick=self.view_basic_info),
+			State(self.LEFT_SCORE, self._keys({
+				const.BUTTON_0: self.reset_left_score,
+				const.BUTTON_UP: self.incr_left_score,
+				const.BUTTON_DOWN: self.decr_left_score,
+				const.BUTTON_OK: self.save_left_score}),
+				tick=self.blink_score),
+			State(self.RIGHT_SCORE, self._keys({
+				const.BUTTON_0: self.reset_right_score,
+				const.BUTTON_UP: self.incr_right_score,
+				const.BUTTON_DOWN: self.decr_right_score,
+				const.BUTTON_OK: self.save_right_score}),
+				tick=self.blink_score),
+			self._cfg_state(self.SCORE_CFG, MxUseScoreCfg,
+				SettingsViewer.scroll_score_cfg, "Score usage set!"),
+			self._cfg_state(self.DATE_CFG, MxUseDateCfg,
+				SettingsViewer.scroll_date_cfg, "Date usage set!"),
+			self._cfg_state(self.TIME_CFG, MxUseTimeCfg,
+				SettingsViewer.scroll_time_cfg, "Time usage set!"),
+			self._cfg_state(self.TEMPERATURE_CFG, MxUseTemperatureCfg,
+				SettingsViewer.scroll_temperature_cfg,
+				"Temperature usage set!"),
+			self._cfg_state(self.SCROLLING_CFG, MxUseScrollingCfg,
+				SettingsViewer.scroll_scrolling_cfg, "Scrolling set!"),
+			State(self.DAY, self._keys({
+				const.BUTTON_UP: self._change_date(self.mx_date.incr_day),
+				const.BUTTON_DOWN: self._change_date(self.mx_date.decr_day),
+				const.BUTTON_OK: self.confirm_day}),
+				tick=self.blink_date),
+			State(self.MONTH, self._keys({
+				const.BUTTON_UP: self._change_date(self.mx_date.incr_month),
+				const.BUTTON_DOWN: self._change_date(self.mx_date.decr_month),
+				const.BUTTON_OK: self.confirm_month}),
+				tick=self.blink_date),
+			State(self.YEAR, self._keys({
+				const.BUTTON_UP: self._change_date(self.mx_date.incr_year),
+				const.BUTTON_DOWN: self._change_date(self.mx_date.decr_year),
+				const.BUTTON_OK: self.confirm_year}),
+				tick=self.blink_date),
+			State(self.HOUR, self._keys({
+				const.BUTTON_0: self.reset_hour,
+				const.BUTTON_UP: self._change_time(self.mx_time.incr_hour),
+				const.BUTTON_DOWN: self._change_time(self.mx_time.decr_hour),
+				const.BUTTON_OK: self.confirm_hour}),
+				tick=self.blink_time),
+			State(self.MINUTE, self._keys({
+				const.BUTTON_0: self.reset_minute,
+				const.BUTTON_UP: self._change_time(self.mx_time.incr_minute),
+				const.BUTTON_DOWN: self._change_time(self.mx_time.decr_minute),
+				const.BUTTON_OK: self.confirm_minute}),
+				tick=self.blink_time),
+			State(self.BRIGHTNESS, self._keys({
+				const.BUTTON_0: self.reset_brightness,
+				const.BUTTON_UP: self.incr_brightness,
+				const.BUTTON_DOWN: self.decr_brightness,
+				const.BUTTON_OK: self.save_brightness}),
+				tick=self.show_brightness),
+			State(self.SCORE_RESET, self._keys({}), tick=self.reset_score),
+			State(self.REVERT_SCORE, self._keys({}), tick=self.revert_score),
+			State(self.EXPORT_LOG, self._keys({}), tick=self.export_log),
+			State(self.EXIT, self._keys({}), enter=self._exit_flag.set))
+
+		return {state.name: state for state in states}
+
+	def _keys(self, bindings: dict) -> dict:
+		"""
+		Add the buttons working in every state.
+		"""
+
+		keys = {
+			const.BUTTON_STAR: self.toggle_display,
+			const.BUTTON_HASH: self.reinit_display}
+		keys.update(bindings)
+
+		return keys
+
+	def _cfg_state(self, name, cfg_cls, scroll, saved_msg) -> State:
+		"""
+		The setting (a singleton) and the viewer are created,
+		when the state is entered for the first time.
+		"""
+
+		def enable():
+			cfg_cls().use_it = True
+
+		def disable():
+			cfg_cls().use_it = False
+
+		def save():
+			cfg_cls().save()
+			print(saved_msg)
+			return self.BASIC
+
+		async def tick():
+			viewer = self._get_settings_viewer()
+			while True:
+				await scroll(viewer)
+
+		return State(name, self._keys({
+			const.BUTTON_UP: enable,
+			const.BUTTON_DOWN: disable,
+			const.BUTTON_OK: save}), tick=tick)
+
+	def _get_settings_viewer(self) -> SettingsViewer:
+		if self._settings_viewer is None:
+			self._settings_viewer = SettingsViewer()
+
+		return self._settings_viewer
+
+	def _change_date(self, change):
+		def action():
+			change()
+			self.mx_date.render_setting()
+
+		return action
+
+	def _change_time(self, change):
+		def action():
+			change()
+			self.mx_time.render_setting()
+
+		return action
+
+	async def _wait_input(self, timeout_ms):
+		"""
+		Sleep until a button is pushed or the timeout elapses.
+		"""
+
+		try:
+			await asyncio.wait_for_ms(self._input_event.wait(), timeout_ms)
+		except asyncio.TimeoutError:
+			pass
+
+	def button_handler(self, button, addr, ctrl):
+		"""
+		Runs in interrupt context, so it just queues the button.
+		"""
+
+		self.input_queue.put(button, button == NEC_8.REPEAT)
+
+	async def input_operation(self):
+		"""
+		The only consumer of the input events.
+		"""
+
+		while True:
+			await self.input_queue.flag.wait()
+
+			while True:
+				event = self.input_queue.get()
+				if event is None:
+					break
+
+				button, repeats, pushed = event
+				self._input_slice.begin()
+				self.dispatch(button, repeats)
+				self._input_slice.end()
+				self._input_slice.record_wait(
+					utime.ticks_diff(utime.ticks_ms(), pushed) * 1000)
+
+				# Wake up the tasks waiting for input
+				self._input_event.set()
+				self._input_event.clear()
+
+				# pass execution to other tasks
+				await asyncio.sleep_ms(0)
+
+			# Let the rendering continue
+			self.scheduler.input_done()
+
+	def dispatch(self, button, repeats):
+		if repeats:
+			# Button Up/Down holding - repeated push
+			# Button 0 holding - potential score reset
+			# Button Down holding - potential score revert
+			# Button OK holding - exit program
+			if button in self.REPEATABLE_BUTTONS:
+				for _ in range(repeats):
+					self.machine.dispatch(button)
+		else:
+			# reset hold button counters
+			self.reset_score_cnt = 0
+			self.revert_score_cnt = 0
+
+			self.machine.dispatch(button)
+
+	def exec_not_too_fast(self, change):
+		"""
+		Execute the code conditionally.
+		Avoid unwanted double increment/decrement of values
+		- two changes of the same type in a very short time.
+		"""
+
+		MIN_TICKS_DIFF = 200
+
+		t_curr = utime.ticks_ms()
+		t_diff = utime.ticks_diff(t_curr, self.ticks)
+		executed = False
+		# t_diff can also be negative, after a period of time
+		if t_diff > MIN_TICKS_DIFF or t_diff < 0:
+			self.ticks = t_curr
+			# Execute the change itself
+			change()
+			executed = True
+		return executed
+
+	########################
+	# Basic mode
+	########################
+
+	def hold_btn_0(self):
+		"""
+		When the "reset score button" was held for long enough time,
+		it is treated as a signal for resetting the whole score.
+		Long enough time means that the reset score counter hits
+		defined threshold.
+		"""
+
+		if self.reset_score_cnt >= self.HOLD_BTN_RPT_THRESHOLD:
+			self.reset_score_cnt = 0
+			print("Score reset to 0:0")
+			return self.SCORE_RESET
+
+		self.reset_score_cnt += 1
+
+	def hold_btn_down(self):
+		"""
+		When the "revert score button" was held for long enough time,
+		it is treated as a signal for setting the score to it's previous
+		value (the last operation is undone, e.g. if the left side
+		was incremented by 1, it is being decremented by 1).
+		Holding it again goes further back in the score history.
+		Long enough time means that the revert score counter hits
+		defined threshold.
+		"""
+
+		if self.revert_score_cnt >= self.HOLD_BTN_RPT_THRESHOLD:
+			self.revert_score_cnt = 0
+			print("Reverting score...")
+			return self.REVERT_SCORE
+
+		self.revert_score_cnt += 1
+
+	def hold_btn_ok(self):
+		"""
+		When the "OK button" was held for long enough time, it is treated
+		as a signal to exit from the main program execution.
+		Long enough time means that exit counter hits defined threshold.
+		"""
+
+		if self.exit_cnt >= self.HOLD_BTN_RPT_THRESHOLD:
+			self.exit_cnt = 0
+			print("Exiting...")
+			return self.EXIT
+
+		self.exit_cnt += 1
+
+	def start_export_log(self):
+		"""
+		Export the match log to the USB serial console.
+		"""
+
+		print("Exporting match log...")
+		return self.EXPORT_LOG
+
+	def start_score_cfg(self):
+		print("Setting score usage...")
+		return self.SCORE_CFG
+
+	def start_date_cfg(self):
+		print("Setting date usage...")
+		return self.DATE_CFG
+
+	def start_time_cfg(self):
+		print("Setting time usage...")
+		return self.TIME_CFG
+
+	def start_temperature_cfg(self):
+		print("Setting temperature usage...")
+		return self.TEMPERATURE_CFG
+
+	def start_scrolling_cfg(self):
+		print("Setting scrolling...")
+		return self.SCROLLING_CFG
+
+	def start_date_time(self):
+		"""
+		Start with setting the day. Pressing OK button should move to setting
+		the month and to other date & time parts.
+		"""
+
+		self.mx_date.pull()
+		self.mx_date.render_setting()
+		return self.DAY
+
+	def start_brightness(self):
+		self.brightness_changed = True
+		print("Setting brightness...")
+		return self.BRIGHTNESS
+
+	def start_left_score(self):
+		self.mx_score.render()
+		print("Setting left score...")
+		return self.LEFT_SCORE
+
+	def start_right_score(self):
+		self.mx_score.render()
+		print("Setting right score...")
+		return self.RIGHT_SCORE
+
+	def toggle_display(self):
+		"""
+		Display on/off.
+		"""
+
+		if self.display_on:
+			print("Off")
+			self.display.turn_off()
+			self.display_on = False
+		else:
+			print("On")
+			self.display.turn_on()
+			self.display_on = True
+
+	def reinit_display(self):
+		"""
+		Reinitialize display.
+		"""
+
+		print("Resetting display...")
+		asyncio.create_task(
+			self.display.reinit_display(self.mx_bright.get_lvl()))
+
+	async def view_basic_info(self):
+		if self._settings_viewer is not None:
+			self._settings_viewer.disable()
+
+		await self.basic_viewer.view_info()
+
+	########################
+	# Score setting
+	########################
+
+	def reset_left_score(self):
+		self.mx_score.set_left(0)
+		self.mx_score.render()
+		print("Left score set to 0")
+
+	def incr_left_score(self):
+		self.exec_not_too_fast(self.mx_score.incr_left)
+		self.mx_score.render()
+
+	def decr_left_score(self):
+		self.exec_not_too_fast(self.mx_score.decr_left)
+		self.mx_score.render()
+
+	def save_left_score(self):
+		self.mx_score.save()
+		print("Left score set!")
+		return self.BASIC
+
+	def reset_right_score(self):
+		self.mx_score.set_right(0)
+		self.mx_score.render()
+		print("Right score set to 0")
+
+	def incr_right_score(self):
+		self.exec_not_too_fast(self.mx_score.incr_right)
+		self.mx_score.render()
+
+	def decr_right_score(self):
+		self.exec_not_too_fast(self.mx_score.decr_right)
+		self.mx_score.render()
+
+	def save_right_score(self):
+		self.mx_score.save()
+		print("Right score set!")
+		return self.BASIC
+
+	async def blink_score(self):
+		side = const.LEFT if self.machine.state.name == self.LEFT_SCORE \
+			else const.RIGHT
+
+		while True:
+			self.display.clear_half(side)
+			await self._wait_input(300)
+
+			self.mx_score.render()
+			await asyncio.sleep_ms(650)
+
+	async def reset_score(self):
+		self.mx_score.reset()
+		self.mx_score.render()
+		# Pause for some time before re-enabling basic mode again
+		await asyncio.sleep_ms(1500)
+		self.machine.go(self.BASIC)
+
+	async def revert_score(self):
+		self.mx_score.render()
+		await asyncio.sleep_ms(400)
+		side = self.mx_score.get_revert_side()
+		self.display.clear_half(side)
+		await asyncio.sleep_ms(300)
+		self.mx_score.render()
+		await asyncio.sleep_ms(400)
+		self.mx_score.revert()
+		self.mx_score.render()
+		await asyncio.sleep_ms(900)
+		self.machine.go(self.BASIC)
+
+	async def export_log(self):
+		await self.mx_score.export()
+		self.machine.go(self.BASIC)
+
+	########################
+	# Date & time setting
+	########################
+
+	def confirm_day(self):
+		return self.MONTH
+
+	def confirm_month(self):
+		self.mx_date.validate_max_days()
+		return self.YEAR
+
+	def confirm_year(self):
+		self.mx_date.push()
+		return self.HOUR
+
+	def reset_hour(self):
+		self.mx_time.set_hours(0)
+		self.mx_time.render()
+		print("Hour reset set to 0")
+
+	def confirm_hour(self):
+		print("Hour set!")
+		return self.MINUTE
+
+	def reset_minute(self):
+		self.mx_time.set_minutes(0)
+		self.mx_time.render()
+		print("Minute set to 0")
+
+	def confirm_minute(self):
+		self.mx_time.push()
+		print("Minute set!")
+		return self.BASIC
+
+	async def blink_date(self):
+		state = self.machine.state.name
+
+		while True:
+			if state == self.DAY:
+				self.display.clear_quarter(const.TOP_LEFT)
+			elif state == self.MONTH:
+				self.display.clear_quarter(const.TOP_RIGHT)
+			else:
+				self.display.clear_matrix_row(const.BOTTOM_ROW)
+			await self._wait_input(300)
+
+			self.mx_date.render_setting()
+			await asyncio.sleep_ms(650)
+
+	async def blink_time(self):
+		side = const.LEFT if self.machine.state.name == self.HOUR \
+			else const.RIGHT
+
+		while True:
+			self.display.clear_half(side)
+			await self._wait_input(300)
+
+			self.mx_time.render_setting()
+			await asyncio.sleep_ms(650)
+
+	########################
+	# Brightness setting
+	########################
+
+	def reset_brightness(self):
+		self.mx_bright.set_lvl(0)
+		self.brightness_changed = True
+		print("Brightness set to 0")
+
+	def incr_brightness(self):
+		self.brightness_changed |= self.exec_not_too_fast(self.mx_bright.incr)
+
+	def decr_brightness(self):
+		self.brightness_changed |= self.exec_not_too_fast(self.mx_bright.decr)
+
+	def save_brightness(self):
+		self.mx_bright.save()
+		return self.BASIC
+
+	async def show_brightness(self):
+		while True:
+			if self.brightness_changed:
+				self.mx_bright.mx_set()
+				self.mx_bright.render()
+				self.brightness_changed = False
+			await self._input_event.wait()
+
+	async def led_blink(self):
+		led_onboard = Pin(25, Pin.OUT)
+
+		while True:
+			led_onboard.toggle()
+			await asyncio.sleep_ms(500)
+
+	async def mem_monitor(self):
+		while True:
+			print("Free memory: {:.2f} KB".format(gc.mem_free() / 1024))
+			await asyncio.sleep_ms(3000)
+
+	async def main(self):
+		# Frames are transmitted by the second core, or by the compositor
+		frame_worker = FrameWorker(display)
+		if not (const.DISPLAY_CORE1_WORKER and frame_worker.start()):
+			asyncio.create_task(display.run_compositor())
+		asyncio.create_task(self.input_operation())
+		asyncio.create_task(self.led_blink())
+		asyncio.create_task(hw.thermometer.run())
+		asyncio.create_task(nv_mem.run())
+		asyncio.create_task(self.machine.run())
+		# asyncio.create_task(self.mem_monitor())
+
+		print('Running')
+		boot.mark("running")
+		boot.print_timeline("first frame", const.BOOT_FIRST_FRAME_BUDGET_MS)
+		# Deferred from the HW setup, not needed for the first frame
+		print_i2c_devices()
+
+		# Run until the exit is requested
+		await self._exit_flag.wait()
+
+		if frame_worker.running:
+			frame_worker.stop()
+
+		self.scheduler.print_stats()
+
+		print('Exit')
+
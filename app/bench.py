@@ -0,0 +1,602 @@
+# Author: Marek Jankech
+# Copyright Marek Jankech 2022 Released under the MIT license
+
+#########################################################################
+# On-device benchmarks. Run them from the REPL:
+#   import app.bench
+#   app.bench.run()
+# The display is driven through a counting SPI sink, so no HW is touched,
+# except for the renderer benchmarks, which draw on the real display.
+#########################################################################
+
+from app.bus import I2CBus
+from app.char import render_lines, render_lines_py
+from app.clock import RTC, bcd2dec, bcd2dec_py
+from app.data import Config, Datetime
+from app.display import Matrix, diff_row, diff_row_py
+from app.memory import EEPROM
+from app.input import InputQueue
+from app.sched import Scheduler, PRIO_INPUT, PRIO_RENDER, PRIO_BACKGROUND
+from app.state import State, StateMachine
+from app.worker import FrameWorker
+from lib.ir_rx.nec import nec_bits, nec_bits_py
+
+from array import array
+
+import uasyncio as asyncio
+import app.constants as const
+import app.font as mx_font
+
+import utime
+import gc
+
+class CountingSPI:
+	def __init__(self):
+		"""
+		SPI sink counting the write calls and transmitted bytes.
+		"""
+
+		self.writes = 0
+		self.bytes = 0
+
+	def write(self, buf):
+		self.writes += 1
+		self.bytes += len(buf)
+
+	def reset(self):
+		self.writes = 0
+		self.bytes = 0
+
+
+class NullPin:
+	def value(self, val=None):
+		pass
+
+
+class FakeAT24C32:
+	ENODEV = 19
+
+	def __init__(self, write_cycle_ms=5, size=4096):
+		"""
+		Model of the AT24C32 memory on the I2C bus. It does not acknowledge
+		its address until the internal write cycle is complete.
+		"""
+
+		self.mem = bytearray(b'\xff' * size)
+		self.write_cycle_ms = write_cycle_ms
+		self.transactions = 0
+
+		self._busy_until = utime.ticks_ms()
+
+	def _access(self):
+		self.transactions += 1
+
+		if utime.ticks_diff(self._busy_until, utime.ticks_ms()) > 0:
+			raise OSError(FakeAT24C32.ENODEV)
+
+	def writeto(self, addr, buf):
+		self._access()
+
+		return 1
+
+	def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8):
+		self._access()
+
+		return bytes(self.mem[memaddr:memaddr + nbytes])
+
+	def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+		self._access()
+
+		buf[:] = self.mem[memaddr:memaddr + len(buf)]
+
+	def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+		self._access()
+
+		self.mem[memaddr:memaddr + len(buf)] = buf
+		self._busy_until = utime.ticks_add(utime.ticks_ms(), self.write_cycle_ms)
+
+
+class FakeDS3231:
+	def __init__(self):
+		"""
+		Register map of the DS3231 on the I2C bus, counting the transactions.
+		"""
+
+		self.regs = bytearray(const.RTC_REGS_NUM)
+		self.transactions = 0
+
+	def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8):
+		self.transactions += 1
+
+		return bytes(self.regs[memaddr:memaddr + nbytes])
+
+	def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+		self.transactions += 1
+
+		buf[:] = self.regs[memaddr:memaddr + len(buf)]
+
+	def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+		self.transactions += 1
+
+		self.regs[memaddr:memaddr + len(buf)] = buf
+
+
+def _legacy_rtc_cycle(i2c, dt: Datetime):
+	"""
+	Time & temperature read and time write as they were implemented
+	before the register mirror.
+	"""
+
+	i2c.readfrom_mem_into(const.DS3231_I2C_ADDR, 0,
+		bytearray(const.DATE_TIME_REGS_NUM))
+	i2c.readfrom_mem(const.DS3231_I2C_ADDR, const.TMPRTR_REG,
+		const.TMPRTR_REG_NUM)
+
+	for reg, val in enumerate((dt.seconds, dt.minutes, dt.hours, dt.weekday,
+		dt.date, dt.month, dt.year - const.MILLENIUM)):
+		i2c.writeto_mem(const.DS3231_I2C_ADDR, reg, val.to_bytes(1, 'little'))
+
+def _legacy_redraw(matrix: Matrix):
+	"""Redraw as it was implemented before the preallocated transfer buffer."""
+
+	for row_idx in range(const.ROWS_IN_MATRIX):
+		matrix.cs_pin.value(0)
+
+		for matrix_idx in range(const.MATRIXES_IN_ROW):
+			matrix.spi.write(bytearray([const.ROW0 + row_idx,
+				matrix.buffer[(row_idx * const.MATRIXES_IN_ROW) + matrix_idx]]))
+
+		for matrix_idx in range(const.MATRIXES_IN_ROW):
+			matrix.spi.write(bytearray([const.ROW0 + row_idx,
+				matrix.buffer[(row_idx * const.MATRIXES_IN_ROW) + matrix_idx
+				+ Matrix.BOTTOM_HALF_OFFSET]]))
+
+		matrix.cs_pin.value(1)
+
+def measure(func, repeat):
+	"""
+	Call the function repeatedly and return the elapsed time in microseconds
+	and the number of bytes allocated on the heap.
+	"""
+
+	gc.collect()
+	gc.disable()
+
+	alloc_start = gc.mem_alloc()
+	t_start = utime.ticks_us()
+
+	for _ in range(repeat):
+		func()
+
+	elapsed = utime.ticks_diff(utime.ticks_us(), t_start)
+	allocated = gc.mem_alloc() - alloc_start
+
+	gc.enable()
+
+	return elapsed, allocated
+
+def bench_redraw(frames=100):
+	spi = CountingSPI()
+	matrix = Matrix(spi, NullPin(), const.INITIAL_BRIGHTNESS)
+	matrix.fill(0)
+	matrix.text("1:23", 0, 0)
+
+	def full_redraw():
+		matrix.invalidate()
+		matrix.redraw()
+
+	for name, func in (
+		("legacy", lambda: _legacy_redraw(matrix)),
+		("packed", full_redraw),
+		("diffed", matrix.redraw)):
+		spi.reset()
+		matrix.reset_stats()
+		elapsed, allocated = measure(func, frames)
+
+		print("redraw {}: {} us/frame, {} B alloc/frame, "
+			"{} writes/frame, {} B sent/frame".format(
+			name, elapsed // frames, allocated // frames,
+			spi.writes // frames, spi.bytes // frames))
+		print("  rows sent: {}, rows skipped: {}".format(
+			matrix.rows_sent, matrix.rows_skipped))
+
+def bench_compositor(duration_ms=1000, present_ms=2):
+	spi = CountingSPI()
+	matrix = Matrix(spi, NullPin(), const.INITIAL_BRIGHTNESS)
+
+	async def renderer():
+		# Scrolling text presented much faster than the display frame rate
+		x_shift = 0
+		t_start = utime.ticks_ms()
+
+		while utime.ticks_diff(utime.ticks_ms(), t_start) < duration_ms:
+			matrix.fill(0)
+			matrix.text("12:34", x_shift, 0)
+			matrix.redraw_twice()
+			x_shift = (x_shift - 1) % Matrix.WIDTH
+
+			await asyncio.sleep_ms(present_ms)
+
+	async def run_both():
+		compositor = asyncio.create_task(matrix.run_compositor())
+		await asyncio.sleep_ms(0)
+		spi.reset()
+		await renderer()
+		compositor.cancel()
+
+		print("compositor: {} presents, {} frames, {} coalesced, "
+			"{:.1f} fps, {} SPI writes".format(matrix.presents, matrix.frames,
+			matrix.coalesced, matrix.fps(), spi.writes))
+
+	asyncio.run(run_both())
+
+def bench_worker(frames=200):
+	spi = CountingSPI()
+	matrix = Matrix(spi, NullPin(), const.INITIAL_BRIGHTNESS)
+	worker = FrameWorker(matrix)
+
+	if not worker.start():
+		print("worker: threads not available, single core only")
+		return
+
+	spi.reset()
+	t_start = utime.ticks_us()
+
+	for x_shift in range(frames):
+		matrix.fill(0)
+		matrix.text("12:34", x_shift % Matrix.WIDTH, 0)
+		matrix.redraw_twice()
+
+	submit_us = utime.ticks_diff(utime.ticks_us(), t_start)
+
+	# Let the worker finish the last frame
+	utime.sleep_ms(50)
+	worker.stop()
+
+	print("worker: {} us/frame on the first core, {} submits, "
+		"{} frames, {} coalesced, {} SPI writes".format(submit_us // frames,
+		worker.submits, worker.frames, worker.coalesced, spi.writes))
+
+def bench_glyphs(repeat=100):
+	matrix = Matrix(CountingSPI(), NullPin(), const.INITIAL_BRIGHTNESS)
+	# The line source of the glyph is only loaded for the comparison
+	from app.font_src import BigDigit as BigDigitSrc
+
+	char = BigDigitSrc().digits[8]
+	glyph = mx_font.BigDigit().get_glyph(8)
+
+	for name, func in (
+		("lines", lambda: char.render(matrix.fb)),
+		("glyph", lambda: glyph.render(matrix.fb, 0))):
+		elapsed, allocated = measure(func, repeat)
+
+		print("glyph {}: {} us/glyph, {} B alloc/glyph".format(
+			name, elapsed // repeat, allocated // repeat))
+
+def bench_render(repeat=50):
+	from app.hw import display
+	from app.mx_data import MxScore
+	from app.view import BasicViewer, ScrollStrip, SPACE
+
+	score = MxScore()
+	strip = ScrollStrip(BasicViewer.TWO_INFO * BasicViewer.ONE_INFO_LEN + SPACE)
+	strip.update((score, score), (0, SPACE + BasicViewer.ONE_INFO_LEN))
+
+	def scroll_step():
+		strip.show(-SPACE)
+		display.redraw_twice()
+
+	for name, func in (
+		("MxScore.render", score.render),
+		("scroll step", scroll_step)):
+		elapsed, allocated = measure(func, repeat)
+
+		print("{}: {} us, {} B alloc".format(
+			name, elapsed // repeat, allocated // repeat))
+
+def bench_eeprom(saves=10, write_cycle_ms=5):
+	fake = FakeAT24C32(write_cycle_ms)
+	eeprom = EEPROM(I2CBus(fake))
+	cfg = Config(True, True, True, False, True, 1)
+
+	def legacy_save():
+		eeprom.i2c.writeto_mem(const.AT24C32_I2C_ADDR, const.CFG_ADDR,
+			bytes([eeprom._encode_cfg_flags(cfg)]), addrsize=16)
+		utime.sleep_ms(20)
+
+	def polled_save():
+		cfg.scroll = not cfg.scroll
+		eeprom.save_cfg(cfg)
+		eeprom.commit()
+
+	for name, func in (("fixed sleep", legacy_save), ("ack polling", polled_save)):
+		elapsed, _ = measure(func, saves)
+		print("EEPROM save {}: {} us".format(name, elapsed // saves))
+
+	async def async_saves():
+		# Measure how long the event loop is blocked by the saves
+		max_blocked = 0
+		task = asyncio.create_task(async_save_all())
+
+		while not task.done():
+			t_start = utime.ticks_us()
+			await asyncio.sleep_ms(0)
+			max_blocked = max(max_blocked,
+				utime.ticks_diff(utime.ticks_us(), t_start))
+
+		print("EEPROM async save: max loop stall {} us".format(max_blocked))
+
+	async def async_save_all():
+		for _ in range(saves):
+			cfg.scroll = not cfg.scroll
+			await eeprom.save_cfg_async(cfg)
+
+	asyncio.run(async_saves())
+
+	# Rapid changes collapse into one page write
+	fake.transactions = 0
+	for lvl in range(saves):
+		cfg.bright_lvl = lvl & 0x07
+		eeprom.save_cfg(cfg)
+	eeprom.commit()
+	print("EEPROM {} rapid saves: {} I2C transactions".format(
+		saves, fake.transactions))
+
+	eeprom.i2c.print_stats()
+
+def bench_rtc(cycles=20):
+	fake = FakeDS3231()
+	rtc = RTC(fake)
+	dt = Datetime(2022, 6, 15, 12, 30, 45, 3)
+
+	def mirror_cycle():
+		rtc.refresh()
+		rtc.read_time_into(dt)
+		rtc.temperature()
+		rtc.set_time(dt)
+
+	for name, func in (
+		("separate", lambda: _legacy_rtc_cycle(fake, dt)),
+		("mirror", mirror_cycle)):
+		fake.transactions = 0
+		elapsed, allocated = measure(func, cycles)
+
+		print("RTC read & write {}: {} us, {} B alloc, "
+			"{} I2C transactions".format(name, elapsed // cycles,
+			allocated // cycles, fake.transactions // cycles))
+
+def bench_dispatch(pushes=1000):
+	# Two states with a table of the same size as the one of the basic mode
+	keys = [const.BUTTON_0, const.BUTTON_1, const.BUTTON_3, const.BUTTON_4,
+		const.BUTTON_5, const.BUTTON_6, const.BUTTON_7, const.BUTTON_8,
+		const.BUTTON_9, const.BUTTON_LEFT, const.BUTTON_RIGHT,
+		const.BUTTON_DOWN, const.BUTTON_STAR, const.BUTTON_HASH]
+	table = {key: lambda: None for key in keys}
+	table[const.BUTTON_OK] = lambda: 1
+	other = {key: lambda: None for key in keys}
+	other[const.BUTTON_OK] = lambda: 0
+
+	machine = StateMachine({0: State(0, table), 1: State(1, other)}, 0)
+	sequence = keys + [const.BUTTON_OK]
+
+	def push_all():
+		for key in sequence:
+			machine.dispatch(key)
+
+	elapsed, allocated = measure(push_all, pushes // len(sequence))
+	cnt = (pushes // len(sequence)) * len(sequence)
+
+	print("state machine dispatch: {:.1f} us/push, {} B alloc/push, "
+		"{} transitions".format(elapsed / cnt, allocated // cnt,
+		machine.transitions))
+
+def bench_bus(reads=20):
+	fake = FakeAT24C32(0)
+	bus = I2CBus(fake)
+	buf_1 = bytearray(4)
+	buf_2 = bytearray(4)
+
+	async def queued_reads():
+		# Hold the bus, so the reads get queued and merged
+		await bus.acquire()
+		tasks = (asyncio.create_task(bus.read_async(
+				const.AT24C32_I2C_ADDR, 0, buf_1, addrsize=16)),
+			asyncio.create_task(bus.read_async(
+				const.AT24C32_I2C_ADDR, 4, buf_2, addrsize=16)))
+		await asyncio.sleep_ms(0)
+		bus.release()
+		for task in tasks:
+			await task
+
+	async def overtaking():
+		# Order in which the requests get the bus
+		order = []
+
+		async def request(name, priority):
+			await bus.acquire(priority)
+			order.append(name)
+			bus.release()
+
+		await bus.acquire()
+		tasks = [asyncio.create_task(request("flush", I2CBus.PRIO_LOW)),
+			asyncio.create_task(request("time", I2CBus.PRIO_HIGH))]
+		await asyncio.sleep_ms(0)
+		bus.release()
+		for task in tasks:
+			await task
+
+		print("I2C bus grant order: {}".format(order))
+
+	fake.transactions = 0
+	for _ in range(reads):
+		asyncio.run(queued_reads())
+	print("I2C {} pairs of adjacent reads: {} transactions".format(
+		reads, fake.transactions))
+
+	asyncio.run(overtaking())
+
+def bench_sched(pushes=20, push_ms=30, frame_ms=4):
+	# Rendering & background work busy in chunks, input pushed meanwhile
+	queue = InputQueue()
+	scheduler = Scheduler()
+	scheduler.set_input_source(lambda: len(queue) > 0)
+	input_slice = scheduler.register("bench input", PRIO_INPUT, 0,
+		const.INPUT_LATENCY_TARGET_MS)
+	render_slice = scheduler.register("bench render", PRIO_RENDER,
+		const.RENDER_SLICE_BUDGET_MS)
+	bg_slice = scheduler.register("bench background", PRIO_BACKGROUND,
+		const.BACKGROUND_SLICE_BUDGET_MS)
+
+	def busy(duration_ms):
+		t_start = utime.ticks_ms()
+		while utime.ticks_diff(utime.ticks_ms(), t_start) < duration_ms:
+			pass
+
+	async def work(task_slice, done):
+		task_slice.begin()
+		while not done:
+			busy(frame_ms)
+			await task_slice.checkpoint()
+		task_slice.end()
+
+	async def consume(done):
+		while not done:
+			await queue.flag.wait()
+			while True:
+				event = queue.get()
+				if event is None:
+					break
+				input_slice.begin()
+				input_slice.end()
+				input_slice.record_wait(
+					utime.ticks_diff(utime.ticks_ms(), event[2]) * 1000)
+			scheduler.input_done()
+
+	async def run_all():
+		done = []
+		tasks = [asyncio.create_task(work(render_slice, done)),
+			asyncio.create_task(work(bg_slice, done)),
+			asyncio.create_task(consume(done))]
+		for _ in range(pushes):
+			await asyncio.sleep_ms(push_ms)
+			queue.put(const.BUTTON_1)
+		done.append(True)
+		for task in tasks:
+			task.cancel()
+
+	asyncio.run(run_all())
+
+	print("scheduler, {} ms chunks:".format(frame_ms))
+	for task_slice in (input_slice, render_slice, bg_slice):
+		print("  {}: {} slices, max slice {} us, max wait {} us, "
+			"{} over target".format(task_slice.name, task_slice.slices,
+			task_slice.max_slice_us, task_slice.max_wait_us, task_slice.missed))
+
+def bench_snapshots(frames=500, period_ms=1):
+	# The live score is used, the module initializes the HW
+	from app.mx_data import MxScore
+	from machine import Timer
+
+	score = MxScore()
+	saved = score.state()
+	written = [0]
+
+	def writer(_):
+		# The sum of both sides is constant, a torn frame breaks it
+		n = (written[0] + 1) % (MxScore.MAX_SCORE + 1)
+		score.set_score(n, MxScore.MAX_SCORE - n)
+		written[0] = n
+
+	score.set_score(0, MxScore.MAX_SCORE)
+	timer = Timer(-1)
+	timer.init(period=period_ms, mode=Timer.PERIODIC, callback=writer)
+
+	torn = 0
+	seen = set()
+	t_start = utime.ticks_us()
+	try:
+		for _ in range(frames):
+			left, right, _ = score.state()
+			if left + right != MxScore.MAX_SCORE:
+				torn += 1
+			seen.add(left)
+			score.render(redraw=False)
+	finally:
+		timer.deinit()
+	elapsed = utime.ticks_diff(utime.ticks_us(), t_start)
+
+	left, right, _ = score.state()
+	lost = left != written[0] or right != MxScore.MAX_SCORE - written[0]
+	score.set_score(saved[0], saved[1])
+
+	print("score snapshots: {} frames in {} ms, {} distinct values, "
+		"{} torn, last update {}".format(frames, elapsed // 1000, len(seen),
+		torn, "lost" if lost else "kept"))
+
+def bench_native(repeat=100):
+	# Both frames differ in every byte, so every row is copied
+	matrix = Matrix(CountingSPI(), NullPin(), const.INITIAL_BRIGHTNESS)
+	frames = (bytearray(len(matrix.buffer)), bytearray(b"\xff" * len(matrix.buffer)))
+	tx_buf = matrix._tx_buf
+	tx_idx = matrix._tx_idx
+	regs = bytes((0x59, 0x59, 0x23, 0x07, 0x31, 0x12, 0x99))
+	from app.font_src import BigDigit as BigDigitSrc
+
+	char = BigDigitSrc().digits[8]
+	# NEC burst of alternating 0 & 1 bits, 562.5 us marks
+	edges = array("i", (0 for _ in range(69)))
+	t = 0
+	for edge in range(1, 69):
+		edges[edge] = t = t + (9000 if edge == 1 else 4500 if edge == 2 \
+			else 562 if edge % 2 else 1687 if edge % 4 == 0 else 562)
+
+	def frame(diff):
+		def run_frame():
+			for buffer in frames:
+				for row_idx in range(const.ROWS_IN_MATRIX):
+					diff(buffer, tx_buf, tx_idx,
+						row_idx * Matrix.ROW_LATCH_LEN + 1,
+						row_idx * const.CASCADED_MATRIXES,
+						const.CASCADED_MATRIXES)
+		return run_frame
+
+	def time_regs(decode):
+		def run_regs():
+			for reg in regs:
+				decode(reg)
+		return run_regs
+
+	def glyph(render):
+		return lambda: render(matrix.fb, char.hlines, char.vlines, 0, 0)
+
+	def nec(bits):
+		return lambda: bits(edges)
+
+	for name, per, cnt, variants in (
+		("frame diff", "frame", 2, (frame(diff_row_py), frame(diff_row))),
+		("bcd decode", "time", 1, (time_regs(bcd2dec_py), time_regs(bcd2dec))),
+		("char lines", "glyph", 1, (glyph(render_lines_py), glyph(render_lines))),
+		("NEC edges", "decode", 1, (nec(nec_bits_py), nec(nec_bits)))):
+		results = []
+		for func in variants:
+			elapsed, _ = measure(func, repeat)
+			results.append(elapsed / (repeat * cnt))
+
+		print("{}: python {:.1f} us/{}, selected {:.1f} us/{}".format(
+			name, results[0], per, results[1], per))
+
+	print("native emitter: {}".format(diff_row is not diff_row_py))
+
+def run():
+	bench_redraw()
+	bench_compositor()
+	bench_worker()
+	bench_glyphs()
+	bench_native()
+	bench_render()
+	bench_eeprom()
+	bench_rtc()
+	bench_dispatch()
+	bench_bus()
+	bench_sched()
+	bench_snapshots()
@@ -0,0 +1,40 @@
+# Author: Marek Jankech
+# Copyright Marek Jankech 2022 Released under the MIT license
+
+import utime
+
+# (label, ticks_ms) of the boot steps, the ticks count from the reset
+_marks = []
+
+def mark(label):
+    _marks.append((label, utime.ticks_ms()))
+
+def ticks_at(label):
+    """
+    Ticks of the boot step (ms counted from the reset)
+    or None, if it was not marked.
+    """
+
+    for name, ticks in _marks:
+        if name == label:
+            return ticks
+
+    return None
+
+def print_timeline(budget_label=None, budget_ms=None):
+    """
+    Print the boot steps with the time from the reset and from
+    the previous step. The budgeted step is flagged, when it was late.
+    """
+
+    prev = 0
+    for label, ticks in _marks:
+        print("boot: {} at {} ms (+{} ms)".format(label, ticks,
+            utime.ticks_diff(ticks, prev)))
+        prev = ticks
+
+    if budget_label is not None:
+        ticks = ticks_at(budget_label)
+        if ticks is not None and ticks > budget_ms:
+            print("boot: {} over budget by {} ms".format(budget_label,
+                ticks - budget_ms))
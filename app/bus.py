@@ -0,0 +1,210 @@
+# Author: Marek Jankech
+# Copyright Marek Jankech 2022 Released under the MIT license
+
+import uasyncio as asyncio
+import utime
+from machine import I2C
+
+class I2CBus:
+    """
+    Owns the I2C bus shared by more devices (RTC & EEPROM).
+    It provides the same transaction methods as :class:`machine.I2C`,
+    so the device drivers can use it instead, and records transaction
+    counts and latencies per device.
+    Tasks can serialise their transactions by :func:`acquire`
+    and :func:`release`, higher priority requests overtake the waiting
+    lower priority ones.
+    The lock arbitrates only the async callers (:func:`read_async`,
+    the EEPROM commit, the RTC refresh before a frame). The synchronous
+    transaction methods do not wait for it, they run to completion
+    without yielding, so they cannot interleave with a single
+    transaction of a lock holder.
+    """
+
+    PRIO_HIGH = 0
+    PRIO_NORMAL = 1
+    PRIO_LOW = 2
+
+    # Max. length of a merged burst read
+    MAX_BURST_LEN = 32
+
+    def __init__(self, i2c: I2C) -> None:
+        self.i2c = i2c
+
+        self._locked = False
+        # Waiting tasks sorted by priority: [priority, order, event]
+        self._waiters = []
+        self._order = 0
+
+        # Queued register reads: [addr, memaddr, buf, addrsize, done]
+        self._reads = []
+        self._burst = bytearray(self.MAX_BURST_LEN)
+
+        # Device address -> [transactions, total us, max us]
+        self.stats = {}
+
+    def scan(self):
+        return self.i2c.scan()
+
+    def writeto(self, addr, buf):
+        t_start = utime.ticks_us()
+        try:
+            return self.i2c.writeto(addr, buf)
+        finally:
+            self._record(addr, t_start)
+
+    def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8):
+        t_start = utime.ticks_us()
+        try:
+            return self.i2c.readfrom_mem(addr, memaddr, nbytes, addrsize=addrsize)
+        finally:
+            self._record(addr, t_start)
+
+    def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+        t_start = utime.ticks_us()
+        try:
+            self.i2c.readfrom_mem_into(addr, memaddr, buf, addrsize=addrsize)
+        finally:
+            self._record(addr, t_start)
+
+    def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+        t_start = utime.ticks_us()
+        try:
+            self.i2c.writeto_mem(addr, memaddr, buf, addrsize=addrsize)
+        finally:
+            self._record(addr, t_start)
+
+    async def acquire(self, priority=PRIO_NORMAL):
+        if not self._locked and not self._waiters:
+            self._locked = True
+            return
+
+        event = asyncio.Event()
+        entry = [priority, self._order, event]
+        self._order += 1
+
+        idx = 0
+        while idx < len(self._waiters) and self._waiters[idx][0] <= priority:
+            idx += 1
+        self._waiters.insert(idx, entry)
+
+        # The lock is handed over by release()
+        try:
+            await event.wait()
+        except asyncio.CancelledError:
+            if event.is_set():
+                # Handed over already, pass it on
+                self.release()
+            else:
+                self._remove(self._waiters, entry)
+            raise
+
+    def release(self):
+        if self._waiters:
+            self._waiters.pop(0)[2].set()
+        else:
+            self._locked = False
+
+    async def read_async(self, addr, memaddr, buf, addrsize=8,
+        priority=PRIO_NORMAL):
+        """
+        Queued register read. Reads of adjacent or overlapping registers
+        of the same device, which are waiting in the queue, are merged
+        into a single burst read. Reads longer than the burst buffer
+        are not queued for merging.
+        """
+
+        if len(buf) > self.MAX_BURST_LEN:
+            await self.acquire(priority)
+            try:
+                self.readfrom_mem_into(addr, memaddr, buf, addrsize=addrsize)
+            finally:
+                self.release()
+            return
+
+        request = [addr, memaddr, buf, addrsize, False]
+        self._reads.append(request)
+
+        try:
+            await self.acquire(priority)
+            try:
+                if not request[4]:
+                    self._burst_read(request)
+            finally:
+                self.release()
+        finally:
+            # Cancelled or failed
+            if not request[4]:
+                self._remove(self._reads, request)
+
+    def _burst_read(self, request):
+        addr, start, _, addrsize, _ = request
+        end = start + len(request[2])
+        batch = [request]
+
+        # Grow the span by the queued reads touching it
+        grown = True
+        while grown:
+            grown = False
+            for other in self._reads:
+                if (other[0] != addr or other[3] != addrsize
+                    or self._contains(batch, other)):
+                    continue
+                o_start = other[1]
+                o_end = o_start + len(other[2])
+                if (o_start <= end and o_end >= start
+                    and max(end, o_end) - min(start, o_start) <= self.MAX_BURST_LEN):
+                    start = min(start, o_start)
+                    end = max(end, o_end)
+                    batch.append(other)
+                    grown = True
+
+        burst = memoryview(self._burst)[0:end - start]
+        self.readfrom_mem_into(addr, start, burst, addrsize=addrsize)
+
+        for req in batch:
+            offset = req[1] - start
+            req[2][:] = burst[offset:offset + len(req[2])]
+            req[4] = True
+
+        # Drop the completed requests by the flag, equal lists are distinct
+        idx = len(self._reads)
+        while idx:
+            idx -= 1
+            if self._reads[idx][4]:
+                del self._reads[idx]
+
+    @staticmethod
+    def _remove(queue, item):
+        # By identity, unlike list.remove()
+        for idx in range(len(queue)):
+            if queue[idx] is item:
+                del queue[idx]
+                return
+
+    @staticmethod
+    def _contains(batch, request):
+        # By identity, equal requests of different tasks are distinct
+        for req in batch:
+            if req is request:
+                return True
+
+        return False
+
+    def _record(self, addr, t_start):
+        elapsed = utime.ticks_diff(utime.ticks_us(), t_start)
+
+        stat = self.stats.get(addr)
+        if stat is None:
+            stat = [0, 0, 0]
+            self.stats[addr] = stat
+
+        stat[0] += 1
+        stat[1] += elapsed
+        if elapsed > stat[2]:
+            stat[2] = elapsed
+
+    def print_stats(self):
+        for addr, (cnt, total, max_us) in self.stats.items():
+            print("I2C 0x{:02x}: {} transactions, avg {} us, max {} us".format(
+                addr, cnt, total // cnt, max_us))
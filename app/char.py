@@ -3,39 +3,49 @@
 
 from app.line import HorizontalLine, VerticalLine
 
+def render_lines_py(framebuf, hlines, vlines, x, y):
+	for line in hlines:
+		line.render(framebuf, x, y)
+
+	for line in vlines:
+		line.render(framebuf, x, y)
+
+# Native implementation, if the port has the native emitter
+try:
+	from app.native import render_lines
+except (ImportError, SyntaxError):
+	render_lines = render_lines_py
+
 class Char:
 	def __init__(self, hlines: list[HorizontalLine], vlines: list[VerticalLine]):
 		"""
 		Represents a digit defined by horizontal and vertical lines
 		spreading out on top matrix and bottom matrix (2 framebuffers).
+		It is immutable.
 		"""
 
 		self.hlines = hlines
 		self.vlines = vlines
 
-	def x_shift(self, x_offset: int):
-		for line in self.hlines:
-			line.x_shift(x_offset)
-
-		for line in self.vlines:
-			line.x_shift(x_offset)
-		
-	def deepcopy(self):
-		hlines = []
-		vlines = []
+	def render(self, framebuf, x=0, y=0):
+		"""
+		Render the char at the given offset. The char itself is never
+		modified, so it can be shared.
+		"""
 
-		for line in self.hlines:
-			hlines.append(line.copy())
+		render_lines(framebuf, self.hlines, self.vlines, x, y)
 
-		for line in self.vlines:
-			vlines.append(line.copy())
+	def rasterise(self, width: int, height: int) -> bytearray:
+		"""
+		Rasterise the lines into a packed bitmap with MONO_HLSB layout.
+		"""
 
-		return Char(hlines, vlines)
+		bitmap = bytearray(((width + 7) // 8) * height)
 
-	def render(self, framebuf):
 		for line in self.hlines:
-			line.render(framebuf)
+			line.rasterise(bitmap, width, height)
 
 		for line in self.vlines:
-			line.render(framebuf)
-			
\ No newline at end of file
+			line.rasterise(bitmap, width, height)
+
+		return bitmap
@@ -1,66 +1,206 @@
 # Author: Marek Jankech
 # Copyright Marek Jankech 2022 Released under the MIT license
 
-from machine import I2C
+from machine import Pin
+from app.bus import I2CBus
 from app.data import Datetime
 
+from array import array
+
+import uasyncio as asyncio
 import app.constants as const
+import utime
+
+def bcd2dec_py(bcd):
+    return (((bcd & const.HIGHER_NIBBLE_MASK) >> const.ONE_NIBBLE)
+        * const.DEC_BASE + (bcd & const.LOWER_NIBBLE_MASK))
+
+# Viper implementation, if the port has the native emitter
+try:
+    from app.native import bcd2dec
+except (ImportError, SyntaxError):
+    bcd2dec = bcd2dec_py
 
 class RTC:
-    "Adapted from https://github.com/peterhinch/micropython-samples/blob/master/DS3231/ds3231_port.py"
+    """
+    Adapted from https://github.com/peterhinch/micropython-samples/blob/master/DS3231/ds3231_port.py
+    The whole register map is mirrored in a preallocated buffer.
+    It is refreshed by one burst read, the time is written by one burst
+    write and the values are decoded from the mirror.
+    """
 
-    def __init__(self, i2c: I2C):
+    def __init__(self, i2c: I2CBus):
         self.i2c = i2c
-        self.timebuf = bytearray(const.DATE_TIME_REGS_NUM)
 
-    def _bcd2dec(self, bcd):
-        return (((bcd & const.HIGHER_NIBBLE_MASK) >> const.ONE_NIBBLE)
-            * const.DEC_BASE + (bcd & const.LOWER_NIBBLE_MASK))
+        self._regs = bytearray(const.RTC_REGS_NUM)
+        regs_mv = memoryview(self._regs)
+        self._time_regs = regs_mv[0:const.DATE_TIME_REGS_NUM]
+        self._alarm2_regs = regs_mv[
+            const.ALARM2_MINUTES_REG:const.ALARM2_MINUTES_REG + const.ALARM2_REGS_NUM]
+        # Single register views for the control & status access
+        self._reg_views = tuple(regs_mv[reg:reg + 1]
+            for reg in range(const.RTC_REGS_NUM))
+        self._tmprtr_regs = regs_mv[
+            const.TMPRTR_REG:const.TMPRTR_REG + const.TMPRTR_REG_NUM]
+
+    _bcd2dec = staticmethod(bcd2dec)
 
     def _dec2bcd(self, dec):
         tens, ones = divmod(dec, const.DEC_BASE)
         return (tens << const.ONE_NIBBLE) | ones
 
-    def _tobyte(self, num: int):
-        return num.to_bytes(1, 'little')
-    
+    def refresh(self):
+        """
+        Read all the registers into the mirror by one transaction.
+        """
+
+        self.i2c.readfrom_mem_into(const.DS3231_I2C_ADDR, 0, self._regs)
+
+    async def refresh_async(self, priority=I2CBus.PRIO_HIGH):
+        """
+        Same as :func:`refresh`, but through the bus queue,
+        so it overtakes the background transactions.
+        """
+
+        await self.i2c.read_async(const.DS3231_I2C_ADDR, 0, self._regs,
+            priority=priority)
+
     def get_time(self) -> Datetime:
-        self.i2c.readfrom_mem_into(const.DS3231_I2C_ADDR, 0, self.timebuf)
+        self.refresh()
+
+        dt = Datetime(0, 0, 0, 0, 0, 0, 0)
+        self.read_time_into(dt)
 
-        seconds = self._bcd2dec(self.timebuf[const.SECONDS_MEM_ADDR])
-        minutes = self._bcd2dec(self.timebuf[const.MINUTES_MEM_ADDR])
-        hours = self._bcd2dec(self.timebuf[const.HOURS_MEM_ADDR] & 0x3f)
-        weekday = self.timebuf[const.WEEKDAY_MEM_ADDR]
-        date = self._bcd2dec(self.timebuf[const.DATE_MEM_ADDR])
-        month = self._bcd2dec(self.timebuf[const.MONTH_MEM_ADDR] & 0x1f)
-        year = self._bcd2dec(self.timebuf[const.YEAR_MEM_ADDR]) + const.MILLENIUM
+        return dt
 
-        return Datetime(year, month, date, hours, minutes, seconds, weekday)
+    def read_time_into(self, dt: Datetime):
+        """
+        Decode the time from the mirror into an existing object.
+        """
+
+        regs = self._regs
+
+        dt.seconds = self._bcd2dec(regs[const.SECONDS_MEM_ADDR])
+        dt.minutes = self._bcd2dec(regs[const.MINUTES_MEM_ADDR])
+        dt.hours = self._bcd2dec(regs[const.HOURS_MEM_ADDR] & 0x3f)
+        dt.weekday = regs[const.WEEKDAY_MEM_ADDR]
+        dt.date = self._bcd2dec(regs[const.DATE_MEM_ADDR])
+        dt.month = self._bcd2dec(regs[const.MONTH_MEM_ADDR] & 0x1f)
+        dt.year = self._bcd2dec(regs[const.YEAR_MEM_ADDR]) + const.MILLENIUM
 
     def set_time(self, dt: Datetime):
+        regs = self._regs
+
+        regs[const.SECONDS_MEM_ADDR] = self._dec2bcd(dt.seconds)
+        regs[const.MINUTES_MEM_ADDR] = self._dec2bcd(dt.minutes)
+        regs[const.HOURS_MEM_ADDR] = self._dec2bcd(dt.hours)
+        regs[const.WEEKDAY_MEM_ADDR] = self._dec2bcd(dt.weekday)
+        regs[const.DATE_MEM_ADDR] = self._dec2bcd(dt.date)
+        regs[const.MONTH_MEM_ADDR] = self._dec2bcd(dt.month)
+        regs[const.YEAR_MEM_ADDR] = self._dec2bcd(dt.year - const.MILLENIUM)
+
         self.i2c.writeto_mem(const.DS3231_I2C_ADDR, const.SECONDS_MEM_ADDR,
-            self._tobyte(self._dec2bcd(dt.seconds)))
-        self.i2c.writeto_mem(const.DS3231_I2C_ADDR, const.MINUTES_MEM_ADDR,
-            self._tobyte(self._dec2bcd(dt.minutes)))
-        self.i2c.writeto_mem(const.DS3231_I2C_ADDR, const.HOURS_MEM_ADDR,
-            self._tobyte(self._dec2bcd(dt.hours)))
-        self.i2c.writeto_mem(const.DS3231_I2C_ADDR, const.WEEKDAY_MEM_ADDR,
-            self._tobyte(self._dec2bcd(dt.weekday)))
-        self.i2c.writeto_mem(const.DS3231_I2C_ADDR, const.DATE_MEM_ADDR,
-            self._tobyte(self._dec2bcd(dt.date)))
-        self.i2c.writeto_mem(const.DS3231_I2C_ADDR, const.MONTH_MEM_ADDR,
-            self._tobyte(self._dec2bcd(dt.month)))
-        self.i2c.writeto_mem(const.DS3231_I2C_ADDR, const.YEAR_MEM_ADDR,
-            self._tobyte(self._dec2bcd(dt.year - const.MILLENIUM)))
+            self._time_regs)
+
+    def enable_square_wave(self):
+        """
+        Output 1 Hz square wave on the SQW/INT pin.
+        """
+
+        ctrl = self._read_reg(const.CONTROL_REG)
+        ctrl &= ~(const.CONTROL_INTCN_MASK | const.CONTROL_RS_MASK)
+        self._write_reg(const.CONTROL_REG, ctrl)
+
+    def enable_minute_alarm(self):
+        """
+        Pull the SQW/INT pin low every minute (at 00 seconds) by Alarm 2.
+        """
+
+        for i in range(const.ALARM2_REGS_NUM):
+            self._alarm2_regs[i] = const.ALARM_MASK_BIT
+        self.i2c.writeto_mem(const.DS3231_I2C_ADDR, const.ALARM2_MINUTES_REG,
+            self._alarm2_regs)
+
+        ctrl = self._read_reg(const.CONTROL_REG)
+        ctrl |= const.CONTROL_INTCN_MASK | const.CONTROL_A2IE_MASK
+        self._write_reg(const.CONTROL_REG, ctrl)
+
+        self.clear_minute_alarm()
+
+    def clear_minute_alarm(self):
+        """
+        Release the SQW/INT pin after Alarm 2 has fired.
+        """
+
+        status = self._read_reg(const.STATUS_REG)
+        self._write_reg(const.STATUS_REG, status & ~const.STATUS_A2F_MASK)
+
+    def start_conversion(self):
+        """
+        Force a temperature conversion by the CONV bit.
+        """
+
+        ctrl = self._read_reg(const.CONTROL_REG)
+        self._write_reg(const.CONTROL_REG, ctrl | const.CONTROL_CONV_MASK)
+
+    def is_busy(self) -> bool:
+        """
+        A temperature conversion is in progress.
+        """
+
+        return bool(self._read_reg(const.STATUS_REG) & const.STATUS_BSY_MASK)
+
+    async def is_busy_async(self, priority=I2CBus.PRIO_LOW) -> bool:
+        """
+        Same as :func:`is_busy`, but through the bus queue.
+        """
+
+        await self.i2c.read_async(const.DS3231_I2C_ADDR, const.STATUS_REG,
+            self._reg_views[const.STATUS_REG], priority=priority)
+
+        return bool(self._regs[const.STATUS_REG] & const.STATUS_BSY_MASK)
+
+    def status(self) -> int:
+        """
+        Status register value from the mirror.
+        """
+
+        return self._regs[const.STATUS_REG]
+
+    def _read_reg(self, reg) -> int:
+        self.i2c.readfrom_mem_into(const.DS3231_I2C_ADDR, reg,
+            self._reg_views[reg])
+
+        return self._regs[reg]
+
+    def _write_reg(self, reg, val):
+        self._regs[reg] = val
+        self.i2c.writeto_mem(const.DS3231_I2C_ADDR, reg, self._reg_views[reg])
 
     def get_temperature(self) -> float:
-        raw_val = self.i2c.readfrom_mem(
-            const.DS3231_I2C_ADDR, const.TMPRTR_REG, const.TMPRTR_REG_NUM)
+        self.refresh()
+
+        return self.temperature()
+
+    async def get_temperature_async(self, priority=I2CBus.PRIO_LOW) -> float:
+        """
+        Read only the temperature registers through the bus queue.
+        """
+
+        await self.i2c.read_async(const.DS3231_I2C_ADDR, const.TMPRTR_REG,
+            self._tmprtr_regs, priority=priority)
+
+        return self.temperature()
+
+    def temperature(self) -> float:
+        """
+        Temperature decoded from the mirror.
+        """
 
         # first register: upper byte; second register: lower byte
         # omit non-effective bits and align the useful bits in the right order
-        aligned_val = (raw_val[0] << const.ONE_BYTE | raw_val[1]) \
-            >> const.TMPRTR_NON_EFFECTIVE_BITS
+        aligned_val = (self._regs[const.TMPRTR_REG] << const.ONE_BYTE
+            | self._regs[const.TMPRTR_REG + 1]) >> const.TMPRTR_NON_EFFECTIVE_BITS
 
         # decode twos complement
         decoded = -(aligned_val & const.TMPRTR_TWOS_CMPLMNT_MASK) \
@@ -68,3 +208,239 @@ class RTC:
             
         return decoded * const.TMPRTR_RESOLUTION
 
+
+class Clock:
+    def __init__(self, rtc: RTC, refresh_ms=const.CLOCK_REFRESH_MS):
+        """
+        Caches the time read from the Real Time Clock module.
+        In the polling mode, the seconds are extrapolated from the time
+        elapsed since the last read. The time registers are read again,
+        when the minute changes or after the refresh period at the latest.
+        """
+
+        self._rtc = rtc
+        self._refresh_ms = refresh_ms
+
+        # The snapshot is decoded into the same object on every read
+        self._datetime = Datetime(0, 0, 0, 0, 0, 0, 0)
+        self._snapshot = None
+        self._read_ticks = 0
+        self._read_seconds = 0
+
+        self._tick_mode = const.RTC_TICK_NONE
+        self._ticks = 0
+
+        self.reads = 0
+        self.saved_reads = 0
+        self.lost_ticks = 0
+
+    def enable_tick(self, pin: Pin, tick_mode):
+        """
+        Event driven mode. The RTC module signalizes each second
+        (square wave) or each minute (Alarm 2) on its SQW/INT output
+        and the time is read only when the minute changes,
+        so there is no polling I2C traffic at all.
+        If the tick stops coming, the time is polled instead.
+        """
+
+        if tick_mode == const.RTC_TICK_SECOND:
+            self._rtc.enable_square_wave()
+        else:
+            self._rtc.enable_minute_alarm()
+
+        self._tick_mode = tick_mode
+        self._ticks = 0
+        self.invalidate()
+
+        pin.irq(handler=self._on_tick, trigger=Pin.IRQ_FALLING, hard=True)
+
+    def _on_tick(self, pin):
+        self._ticks += 1
+
+    def now(self) -> Datetime:
+        """
+        Return the cached snapshot of the time. It is shared,
+        so it must not be modified.
+        """
+
+        if self._snapshot is None:
+            return self.refresh()
+
+        elapsed = utime.ticks_diff(utime.ticks_ms(), self._read_ticks)
+        tick_mode = self._active_tick_mode(elapsed)
+
+        if tick_mode == const.RTC_TICK_MINUTE:
+            if self._ticks:
+                self._rtc.clear_minute_alarm()
+                return self.refresh()
+
+            self.saved_reads += 1
+            return self._snapshot
+
+        if tick_mode == const.RTC_TICK_SECOND:
+            seconds = self._read_seconds + self._ticks
+        else:
+            seconds = self._polled_seconds(elapsed)
+
+        if seconds is None or seconds >= 60:
+            # The minute has changed since the last read
+            return self.refresh()
+
+        self._snapshot.seconds = seconds
+        self.saved_reads += 1
+
+        return self._snapshot
+
+    async def now_async(self) -> Datetime:
+        """
+        Same as :func:`now`, but the time is read through the bus queue
+        with high priority. Call it before rendering a frame, so the renderers
+        get a fresh snapshot without waiting for background transactions.
+        """
+
+        seconds = None
+        if self._snapshot is not None:
+            elapsed = utime.ticks_diff(utime.ticks_ms(), self._read_ticks)
+            if self._active_tick_mode(elapsed) != const.RTC_TICK_NONE:
+                return self.now()
+            seconds = self._polled_seconds(elapsed)
+
+        if seconds is None or seconds >= 60:
+            await self._rtc.refresh_async()
+            self._set_snapshot()
+
+        return self.now()
+
+    def _active_tick_mode(self, elapsed):
+        """
+        The tick mode or RTC_TICK_NONE (polling), if the tick is late
+        by more than the timeout, e.g. the SQW/INT output has stopped.
+        """
+
+        if self._tick_mode == const.RTC_TICK_SECOND:
+            late = elapsed - self._ticks * 1000
+        elif self._tick_mode == const.RTC_TICK_MINUTE and not self._ticks:
+            late = elapsed - (60 - self._read_seconds) * 1000
+        else:
+            return self._tick_mode
+
+        if late > const.CLOCK_TICK_TIMEOUT_MS:
+            self.lost_ticks += 1
+            return const.RTC_TICK_NONE
+
+        return self._tick_mode
+
+    def _polled_seconds(self, elapsed):
+        """
+        Seconds extrapolated from the last read or None,
+        if the refresh period has expired.
+        """
+
+        if elapsed >= self._refresh_ms:
+            return None
+
+        return self._read_seconds + elapsed // 1000
+
+    def refresh(self) -> Datetime:
+        """
+        Read the time from the Real Time Clock module right now.
+        """
+
+        self._rtc.refresh()
+        self._set_snapshot()
+
+        return self._snapshot
+
+    def _set_snapshot(self):
+        self._ticks = 0
+        self._rtc.read_time_into(self._datetime)
+        self._snapshot = self._datetime
+        self._read_ticks = utime.ticks_ms()
+        self._read_seconds = self._snapshot.seconds
+        self.reads += 1
+
+    def invalidate(self):
+        """
+        Force the next :func:`now` to read the Real Time Clock module.
+        """
+
+        self._snapshot = None
+
+    def set_time(self, dt: Datetime):
+        self._rtc.set_time(dt)
+        self.invalidate()
+
+
+class Thermometer:
+    def __init__(self, rtc: RTC, ttl_ms=const.TMPRTR_TTL_MS,
+        history_len=const.TMPRTR_HISTORY_LEN):
+        """
+        Caches the temperature read from the Real Time Clock module's sensor.
+        The readers get only the cached value, there is no I2C traffic
+        in the render path. The temperature is read once here and then
+        refreshed by the :func:`run` task after each TTL period.
+        Last readings are kept in a fixed-size history for smoothing.
+        """
+
+        self._rtc = rtc
+        self._ttl_ms = ttl_ms
+
+        self._value = None
+
+        self._history = array('f', (0 for _ in range(history_len)))
+        self._history_idx = 0
+        self._history_cnt = 0
+
+        self._store(self._rtc.get_temperature())
+
+    def get(self) -> float:
+        """
+        Return the last temperature reading.
+        """
+
+        return self._value
+
+    def get_smoothed(self) -> float:
+        """
+        Return the average of the readings in the history.
+        """
+
+        total = 0
+        for i in range(self._history_cnt):
+            total += self._history[i]
+
+        return total / self._history_cnt
+
+    async def run(self):
+        """
+        Refresh the cached temperature after each TTL period.
+        """
+
+        await self.convert()
+        while True:
+            await asyncio.sleep_ms(self._ttl_ms)
+            self._store(await self._rtc.get_temperature_async())
+
+    async def convert(self):
+        """
+        Force a temperature conversion and wait until it is finished
+        without blocking the other tasks.
+        """
+
+        while await self._rtc.is_busy_async():
+            await asyncio.sleep_ms(const.TMPRTR_CONV_POLL_MS)
+
+        self._rtc.start_conversion()
+
+        while await self._rtc.is_busy_async():
+            await asyncio.sleep_ms(const.TMPRTR_CONV_POLL_MS)
+
+        self._store(await self._rtc.get_temperature_async())
+
+    def _store(self, value):
+        self._value = value
+
+        self._history[self._history_idx] = self._value
+        self._history_idx = (self._history_idx + 1) % len(self._history)
+        if self._history_cnt < len(self._history):
+            self._history_cnt += 1
@@ -18,6 +18,12 @@ CASCADED_MATRIXES = 8
 MATRIXES_IN_ROW = 4
 MATRIXES_IN_COL = 2
 
+########################
+# Fonts
+########################
+GLYPH_WIDTH = 8
+GLYPH_HEIGHT = 16
+
 ########################
 # Offsets
 ########################
@@ -59,6 +65,10 @@ DISPLAY_SPI_ID = 1
 DISPLAY_SPI_BAUD = 5_000_000
 DISPLAY_SPI_POLARITY = 1
 DISPLAY_SPI_PHASE = 0
+# Max. frame rate of the display compositor
+DISPLAY_MAX_FPS = 50
+# Transmit the frames from the second core, if available
+DISPLAY_CORE1_WORKER = False
 
 RTC_I2C_ID = 1
 
@@ -74,6 +84,8 @@ DISPLAY_SPI_MOSI_PIN = 15
 
 RECV_PIN = 28
 
+RTC_SQW_PIN = 22
+
 ########################
 # Buttons
 ########################
@@ -97,6 +109,9 @@ BUTTON_DOWN = 0X52
 BUTTON_LEFT = 0X08
 BUTTON_RIGHT = 0X5A
 
+# Input events waiting for the dispatch
+INPUT_QUEUE_LEN = 16
+
 ########################
 # Halves & quarters
 ########################
@@ -126,14 +141,62 @@ MONTH_MEM_ADDR = 5
 YEAR_MEM_ADDR = 6
 DATE_TIME_REGS_NUM = 7
 
+ALARM2_MINUTES_REG = 0X0B
+ALARM2_REGS_NUM = 3
+CONTROL_REG = 0X0E
+STATUS_REG = 0X0F
+# Whole register map, 0x00 - 0x12
+RTC_REGS_NUM = 0X13
+
+ALARM_MASK_BIT = 0X80
+CONTROL_A2IE_MASK = 0X02
+CONTROL_INTCN_MASK = 0X04
+CONTROL_RS_MASK = 0X18
+CONTROL_CONV_MASK = 0X20
+STATUS_A2F_MASK = 0X02
+STATUS_BSY_MASK = 0X04
+
+# SQW/INT output usage
+RTC_TICK_NONE = 0
+RTC_TICK_SECOND = 1
+RTC_TICK_MINUTE = 2
+
 ########################
 # EEPROM module
 ########################
 AT24C32_I2C_ADDR = 0x57
+# The internal write cycle takes max. 10 ms, typically ~5 ms
+AT24C32_WRITE_TIMEOUT_MS = 20
+AT24C32_ACK_POLL_MS = 1
+AT24C32_PAGE_LEN = 32
+# Used region of the memory kept in RAM - old layout page and A/B pages
+AT24C32_SHADOW_LEN = 0X60
+AT24C32_FLUSH_DEBOUNCE_MS = 1000
+AT24C32_SIZE = 4096
+
+# Score journal - ring buffer in the rest of the memory
+JOURNAL_START_ADDR = 0X100
+JOURNAL_END_ADDR = AT24C32_SIZE
 
+# Former single-byte layout, only migrated from
 CFG_ADDR = 0X000
 LAST_SCORE_ADDR = 0X00A
 
+# State record: version, generation, config flags, brightness level,
+# left score, right score, CRC-16 (2 bytes, big endian)
+STATE_A_ADDR = 0X020
+STATE_B_ADDR = 0X040
+STATE_RECORD_LEN = 8
+STATE_VERSION = 1
+
+STATE_VERSION_IDX = 0
+STATE_GENERATION_IDX = 1
+STATE_CFG_IDX = 2
+STATE_BRIGHT_LVL_IDX = 3
+STATE_LEFT_SCORE_IDX = 4
+STATE_RIGHT_SCORE_IDX = 5
+STATE_CRC_IDX = 6
+
 USE_SCORE_CFG_MASK = 0X01
 USE_DATE_CFG_MASK = 0X02
 USE_TIME_CFG_MASK = 0X04
@@ -147,12 +210,46 @@ RIGHT_SCORE_MASK = 0X0F
 BRIGHT_LVL_BIT_SHIFT = 5
 LEFT_SCORE_BIT_SHIFT = 4
 
+BRIGHT_LVL_MAX = 0X0F
+
+########################
+# Boot
+########################
+# Time from the reset to the first frame
+BOOT_FIRST_FRAME_BUDGET_MS = 1000
+
+########################
+# Scheduling
+########################
+# Time budgets per slice
+RENDER_SLICE_BUDGET_MS = 10
+BACKGROUND_SLICE_BUDGET_MS = 5
+# Max. time from a button push to its dispatch
+INPUT_LATENCY_TARGET_MS = 50
+
+########################
+# Scrolling
+########################
+# Speeds in pixels per second
+SCROLL_IN_SPEED = 100
+SCROLL_SPEED = 200
+CFG_SCROLL_SPEED = 50
+
 ########################
 # Date & time
 ########################
 DEC_BASE = 10
 MILLENIUM = 2000
 
+# Polling: max. time between two reads, the seconds are extrapolated
+# in between and the time is read again, when the minute changes
+CLOCK_REFRESH_MS = 60_000
+# Polling by default, the SQW/INT output is not wired on every board
+CLOCK_TICK_MODE = RTC_TICK_NONE
+# The tick is considered lost, when it is late by more than this,
+# the time is polled until it comes again
+CLOCK_TICK_TIMEOUT_MS = 2000
+
 ########################
 # Temperature
 ########################
@@ -162,4 +259,8 @@ TMPRTR_RESOLUTION = 0.25
 TMPRTR_EFFECTIVE_BITS = 10
 TMPRTR_NON_EFFECTIVE_BITS = 6
 TMPRTR_TWOS_CMPLMNT_MASK = 0b1000000000
+# The RTC module refreshes the temperature registers every 64 seconds
+TMPRTR_TTL_MS = 64_000
+TMPRTR_HISTORY_LEN = 4
+TMPRTR_CONV_POLL_MS = 10
 
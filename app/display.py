@@ -2,18 +2,43 @@
 # Copyright Marek Jankech 2022 Released under the MIT license
 
 from machine import Pin, SPI
-from utime import sleep_ms
 
+import uasyncio as asyncio
 import app.constants as const
+import utime
 
 import framebuf
 
+def diff_row_py(buffer, tx_buf, tx_idx, tx_pos, idx_pos, n) -> bool:
+	"""
+	Copy the data bytes of one row latch from the frame buffer
+	into the transfer buffer. Return True, if any of them has changed.
+	"""
+
+	changed = False
+
+	for i in range(n):
+		val = buffer[tx_idx[idx_pos + i]]
+		if tx_buf[tx_pos + 2 * i] != val:
+			tx_buf[tx_pos + 2 * i] = val
+			changed = True
+
+	return changed
+
+# Viper implementation, if the port has the native emitter
+try:
+	from app.native import diff_row
+except (ImportError, SyntaxError):
+	diff_row = diff_row_py
+
 class Matrix:
 	WIDTH = const.MATRIXES_IN_ROW * const.COLS_IN_MATRIX
 	HEIGHT = const.MATRIXES_IN_COL * const.ROWS_IN_MATRIX
 	HALF_WIDTH = WIDTH // 2
 	HALF_HEIGHT = const.ROWS_IN_MATRIX
 	BOTTOM_HALF_OFFSET = const.MATRIXES_IN_ROW * const.ROWS_IN_MATRIX
+	# One row latch: register address + data byte for every cascaded matrix
+	ROW_LATCH_LEN = 2 * const.CASCADED_MATRIXES
 
 	def __init__(self, spi: SPI, cs_pin: Pin, bright_lvl):
 		"""
@@ -22,24 +47,79 @@ class Matrix:
 		self.spi = spi
 		self.cs_pin = cs_pin
 
+		# Back buffer - all the renderers draw into it
 		self.buffer = bytearray(
 			const.ROWS_IN_MATRIX * const.MATRIXES_IN_ROW * const.MATRIXES_IN_COL)
+		# Front buffer - the last presented frame, transmitted by the compositor
+		self._front = bytearray(len(self.buffer))
 
 		self.fb = framebuf.FrameBuffer(self.buffer, 
 			const.COLS_IN_MATRIX * const.MATRIXES_IN_ROW,
 			const.ROWS_IN_MATRIX * const.MATRIXES_IN_COL, framebuf.MONO_HLSB)
 
-		# Framebuffer methods
-		self.fill = self.fb.fill
-		self.fill_rect = self.fb.fill_rect
-		self.hline = self.fb.hline
-		self.vline = self.fb.vline
-		self.pixel = self.fb.pixel
-		self.text = self.fb.text
+		# Preallocated SPI transfer buffers, so that redrawing does not
+		# allocate anything on the heap.
+		self._cmd_buf = bytearray(Matrix.ROW_LATCH_LEN)
+		self._tx_buf = bytearray(const.ROWS_IN_MATRIX * Matrix.ROW_LATCH_LEN)
+		self._tx_rows = tuple(
+			memoryview(self._tx_buf)[row_idx * Matrix.ROW_LATCH_LEN:
+				(row_idx + 1) * Matrix.ROW_LATCH_LEN]
+			for row_idx in range(const.ROWS_IN_MATRIX))
+		# Index into self.buffer for every data byte of the transfer buffer
+		self._tx_idx = self._build_tx_index()
+
+		for row_idx in range(const.ROWS_IN_MATRIX):
+			for i in range(0, Matrix.ROW_LATCH_LEN, 2):
+				self._tx_buf[row_idx * Matrix.ROW_LATCH_LEN + i] = \
+					const.ROW0 + row_idx
+
+		# The transfer buffer also holds the rows last latched into the chain.
+		# Until the first full redraw, the display contents are unknown.
+		self._latched = False
+		self.rows_sent = 0
+		self.rows_skipped = 0
+
+		# Frames transmitted by a worker thread on the second core,
+		# the SPI is shared with it under the lock
+		self._worker = None
+		self._spi_lock = None
+
+		# Compositor
+		self._compositing = False
+		self._frame_dirty = False
+		self._frame_flag = asyncio.ThreadSafeFlag()
+		self.frames = 0
+		self.presents = 0
+		self.coalesced = 0
+		self._stats_ticks = utime.ticks_ms()
+
+		self._display_fb = self.fb
+		self.draw_into_display()
 
 		self.init_display(bright_lvl)
 
+	def draw_into(self, fb):
+		"""
+		Redirect the framebuffer methods (and so all the renderers)
+		to another framebuffer, e.g. an off-screen scroll strip.
+		"""
+
+		self.fb = fb
+
+		# Framebuffer methods
+		self.fill = fb.fill
+		self.fill_rect = fb.fill_rect
+		self.hline = fb.hline
+		self.vline = fb.vline
+		self.pixel = fb.pixel
+		self.text = fb.text
+
+	def draw_into_display(self):
+		self.draw_into(self._display_fb)
+
 	def init_display(self, bright_lvl: int):
+		self.invalidate()
+
 		self._write(const.SHUTDOWN, const.SHUTDOWN_MODE_ON)
 
 		self._write(const.DISPLAYTEST, const.DISPLAYTEST_TEST_OFF)
@@ -50,20 +130,35 @@ class Matrix:
 
 		self._write(const.SHUTDOWN, const.SHUTDOWN_MODE_OFF)
 
-	def reinit_display(self, bright_lvl: int):
-		self._write(const.SHUTDOWN, const.SHUTDOWN_MODE_ON)
-
-		self._write(const.SCANLIMIT, const.SCANLIMIT_8_DIGITS)
-		self._write(const.DECODEMODE, const.NO_BCD_DECODE)
-		self._write(const.INTENSITY, bright_lvl)
+	async def reinit_display(self, bright_lvl: int):
+		"""
+		The commands are sent under the SPI lock in one go, so a frame
+		of the worker cannot get between them. The frame is handed over
+		as any other one.
+		"""
 
-		self._write(const.SHUTDOWN, const.SHUTDOWN_MODE_OFF)
+		if self._spi_lock is None:
+			self._reinit_cmds(bright_lvl)
+		else:
+			with self._spi_lock:
+				self._reinit_cmds(bright_lvl)
 
 		# Signalize display re-init by horzizontal line in the middle.
 		self.fb.fill(0)
 		self.fb.fill_rect(0, Matrix.HALF_HEIGHT - 1, Matrix.WIDTH, 2, 1)
 		self.redraw_twice()
-		sleep_ms(300)
+		await asyncio.sleep_ms(300)
+
+	def _reinit_cmds(self, bright_lvl):
+		self.invalidate()
+
+		self._write_cmd(const.SHUTDOWN, const.SHUTDOWN_MODE_ON)
+
+		self._write_cmd(const.SCANLIMIT, const.SCANLIMIT_8_DIGITS)
+		self._write_cmd(const.DECODEMODE, const.NO_BCD_DECODE)
+		self._write_cmd(const.INTENSITY, bright_lvl)
+
+		self._write_cmd(const.SHUTDOWN, const.SHUTDOWN_MODE_OFF)
 
 	def turn_off(self):
 		self._write(const.SHUTDOWN, const.SHUTDOWN_MODE_ON)
@@ -75,29 +170,139 @@ class Matrix:
 		self._write(const.INTENSITY, val)
 
 	def redraw_twice(self):
-		"""Some LEDs need to tell it twice to understand..."""
+		"""
+		Some LEDs need to tell it twice to understand...
+		If the compositor or the worker runs, the frame is just handed over.
+		"""
 
-		self.redraw()
-		self.redraw()
+		if self._worker is not None:
+			self._worker.submit(self.buffer)
+		elif self._compositing:
+			self.present()
+		else:
+			self._redraw(self.buffer, 2)
 
 	def redraw(self):
 		"""Translate contents of the buffer to the LED matrix."""
 
-		for row_idx in range(const.ROWS_IN_MATRIX):
-			self.cs_pin.value(0)
+		self._redraw(self.buffer, 1)
+
+	def present(self):
+		"""
+		Swap the finished frame from the back buffer into the front buffer
+		and mark it dirty for the compositor. Frames presented faster
+		than the compositor transmits them are coalesced.
+		"""
+
+		if self._frame_dirty:
+			self.coalesced += 1
+
+		self._front[:] = self.buffer
+		self._frame_dirty = True
+		self.presents += 1
+
+		self._frame_flag.set()
+
+	async def run_compositor(self, max_fps=const.DISPLAY_MAX_FPS):
+		"""
+		The only task transmitting frames to the display. It sleeps
+		until a frame is presented and transmits at most max_fps frames
+		per second.
+		"""
+
+		period_ms = 1000 // max_fps
+		self._compositing = True
+		self.reset_stats()
+
+		try:
+			while True:
+				await self._frame_flag.wait()
+				t_start = utime.ticks_ms()
+
+				if self._frame_dirty:
+					self._frame_dirty = False
+					self._redraw(self._front, 2)
+					self.frames += 1
+
+				remaining = period_ms - utime.ticks_diff(utime.ticks_ms(), t_start)
+				if remaining > 0:
+					await asyncio.sleep_ms(remaining)
+		finally:
+			self._compositing = False
+
+	def attach_worker(self, worker, spi_lock):
+		self._spi_lock = spi_lock
+		self._worker = worker
+
+	def detach_worker(self):
+		"""
+		Called once the worker thread has ended, the SPI is not shared anymore.
+		"""
+
+		self._worker = None
+		self._spi_lock = None
+
+	def transmit(self, buffer):
+		"""
+		Transmit the frame twice, called by the worker thread.
+		"""
+
+		self._redraw(buffer, 2)
+
+	def fps(self) -> float:
+		"""
+		Frames transmitted by the compositor per second since the stats reset.
+		"""
+
+		elapsed = utime.ticks_diff(utime.ticks_ms(), self._stats_ticks)
+
+		return self.frames * 1000 / elapsed if elapsed > 0 else 0
 
-			# First half of the buffer
-			for matrix_idx in range(const.MATRIXES_IN_ROW):
-				self.spi.write(bytearray([const.ROW0 + row_idx, 
-					self.buffer[(row_idx * const.MATRIXES_IN_ROW) + matrix_idx]]))
+	def invalidate(self):
+		"""Force the next redraw to transmit all the rows."""
 
-			# Second half of the buffer
-			for matrix_idx in range(const.MATRIXES_IN_ROW):
-				self.spi.write(bytearray([const.ROW0 + row_idx, 
-					self.buffer[(row_idx * const.MATRIXES_IN_ROW) + matrix_idx
-					+ Matrix.BOTTOM_HALF_OFFSET]]))
+		self._latched = False
 
-			self.cs_pin.value(1)
+	def reset_stats(self):
+		self.rows_sent = 0
+		self.rows_skipped = 0
+		self.frames = 0
+		self.presents = 0
+		self.coalesced = 0
+		self._stats_ticks = utime.ticks_ms()
+
+	def _redraw(self, buffer, repeat):
+		if self._spi_lock is None:
+			self._redraw_rows(buffer, repeat)
+		else:
+			with self._spi_lock:
+				self._redraw_rows(buffer, repeat)
+
+	def _redraw_rows(self, buffer, repeat):
+		"""
+		Each row is latched into the whole chain by a single SPI write
+		of the preallocated transfer buffer. Rows, which are identical
+		to the ones latched last time, are not transmitted at all.
+		"""
+
+		tx_buf = self._tx_buf
+		tx_idx = self._tx_idx
+
+		for row_idx in range(const.ROWS_IN_MATRIX):
+			changed = diff_row(buffer, tx_buf, tx_idx,
+				row_idx * Matrix.ROW_LATCH_LEN + 1,
+				row_idx * const.CASCADED_MATRIXES, const.CASCADED_MATRIXES)
+
+			if changed or not self._latched:
+				for _ in range(repeat):
+					self.cs_pin.value(0)
+					self.spi.write(self._tx_rows[row_idx])
+					self.cs_pin.value(1)
+				self.rows_sent += 1
+			else:
+				self.rows_skipped += 1
+
+		self._latched = True
 
 	def clear_half(self, side):
 		if side == const.LEFT:
@@ -137,11 +342,37 @@ class Matrix:
 
 		self.redraw_twice()
 
+	def _build_tx_index(self):
+		"""
+		Order of the data bytes in one row latch: first half of the buffer
+		(top matrixes), then second half of the buffer (bottom matrixes).
+		"""
+
+		tx_idx = bytearray(const.ROWS_IN_MATRIX * const.CASCADED_MATRIXES)
+		i = 0
+
+		for row_idx in range(const.ROWS_IN_MATRIX):
+			for half_offset in (0, Matrix.BOTTOM_HALF_OFFSET):
+				for matrix_idx in range(const.MATRIXES_IN_ROW):
+					tx_idx[i] = (row_idx * const.MATRIXES_IN_ROW) + matrix_idx \
+						+ half_offset
+					i += 1
+
+		return tx_idx
+
 	def _write(self, register_add, data):
+		if self._spi_lock is None:
+			self._write_cmd(register_add, data)
+		else:
+			with self._spi_lock:
+				self._write_cmd(register_add, data)
+
+	def _write_cmd(self, register_add, data):
+		for i in range(0, Matrix.ROW_LATCH_LEN, 2):
+			self._cmd_buf[i] = register_add
+			self._cmd_buf[i + 1] = data
+
 		self.cs_pin.value(0)
-		
-		for _ in range(const.CASCADED_MATRIXES):
-			self.spi.write(bytearray([register_add, data]))
-		
+		self.spi.write(self._cmd_buf)
 		self.cs_pin.value(1)
 
@@ -0,0 +1,22 @@
+# Author: Marek Jankech
+# Copyright Marek Jankech 2022 Released under the MIT license
+
+import framebuf
+
+class Glyph:
+	def __init__(self, bitmap: bytearray, width: int, height: int):
+		"""
+		Represents a char compiled into a packed bitmap with MONO_HLSB
+		layout, which is drawn by a single blit. The bitmaps are compiled
+		at build time by tools/gen_glyphs.py.
+		"""
+
+		self.bitmap = bitmap
+		self.width = width
+		self.height = height
+		self.fb = framebuf.FrameBuffer(bitmap, width, height, framebuf.MONO_HLSB)
+
+	def render(self, fb, x=0, y=0):
+		# Pixels with color 0 are transparent, the same way as they are
+		# not touched by the line drawing.
+		fb.blit(self.fb, x, y, 0)
@@ -0,0 +1,46 @@
+# Generated by tools/gen_glyphs.py from app/font_src.py, do not edit.
+# Glyphs 8x16 points, MONO_HLSB bitmaps.
+
+BIG_DIGIT = (
+	b'~\xff\xc3\xc3\xc3\xc3\xc3\xc3\xc3\xc3\xc3\xc3\xc3\xc3\xff~',
+	b'\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0',
+	b'\xff\xff\x03\x03\x03\x03\x03\xff\xff\xc0\xc0\xc0\xc0\xc0\xff\xff',
+	b'\xff\xff\x03\x03\x03\x03\x03\xff\xff\x03\x03\x03\x03\x03\xff\xff',
+	b'\xc3\xc3\xc3\xc3\xc3\xc3\xc3\xff\xff\x03\x03\x03\x03\x03\x03\x03',
+	b'\xff\xff\xc0\xc0\xc0\xc0\xc0\xff\xff\x03\x03\x03\x03\x03\xff\xff',
+	b'\xff\xff\xc0\xc0\xc0\xc0\xc0\xff\xff\xc3\xc3\xc3\xc3\xc3\xff\xff',
+	b'\xff\xff\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03',
+	b'\xff\xff\xc3\xc3\xc3\xc3\xc3\xff\xff\xc3\xc3\xc3\xc3\xc3\xff\xff',
+	b'\xff\xff\xc3\xc3\xc3\xc3\xc3\xff\xff\x03\x03\x03\x03\x03\xff\xff',
+)
+
+MEDIUM_DIGIT = (
+	b'\x00x\xfc\xcc\xcc\xcc\xcc\xcc\xcc\xcc\xcc\xcc\xcc\xfcx\x00',
+	b'\x00\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\x00',
+	b'\x00\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\xc0\xc0\xc0\xc0\xfc\xfc\x00',
+	b'\x00\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\x00',
+	b'\x00\xcc\xcc\xcc\xcc\xcc\xcc\xfc\xfc\x0c\x0c\x0c\x0c\x0c\x0c\x00',
+	b'\x00\xfc\xfc\xc0\xc0\xc0\xc0\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\x00',
+	b'\x00\xfc\xfc\xc0\xc0\xc0\xc0\xfc\xfc\xcc\xcc\xcc\xcc\xfc\xfc\x00',
+	b'\x00\xfc\xfc\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x00',
+	b'\x00\xfc\xfc\xcc\xcc\xcc\xcc\xfc\xfc\xcc\xcc\xcc\xcc\xfc\xfc\x00',
+	b'\x00\xfc\xfc\xcc\xcc\xcc\xcc\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\x00',
+)
+
+MEDIUM = {
+	'0': b'\x00x\xfc\xcc\xcc\xcc\xcc\xcc\xcc\xcc\xcc\xcc\xcc\xfcx\x00',
+	'1': b'\x00\x18\x18\x18\x18\x18\x18\x18\x18\x18\x18\x18\x18\x18\x18\x00',
+	'2': b'\x00\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\xc0\xc0\xc0\xc0\xfc\xfc\x00',
+	'3': b'\x00\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\x00',
+	'4': b'\x00\xcc\xcc\xcc\xcc\xcc\xcc\xfc\xfc\x0c\x0c\x0c\x0c\x0c\x0c\x00',
+	'5': b'\x00\xfc\xfc\xc0\xc0\xc0\xc0\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\x00',
+	'6': b'\x00\xfc\xfc\xc0\xc0\xc0\xc0\xfc\xfc\xcc\xcc\xcc\xcc\xfc\xfc\x00',
+	'7': b'\x00\xfc\xfc\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x00',
+	'8': b'\x00\xfc\xfc\xcc\xcc\xcc\xcc\xfc\xfc\xcc\xcc\xcc\xcc\xfc\xfc\x00',
+	'9': b'\x00\xfc\xfc\xcc\xcc\xcc\xcc\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\x00',
+	'°': b'\x00\x0e\n\x0e\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00',
+	'A': b'\x00<~ffff~~ffffff\x00',
+	'C': b'\x00<~``````````~<\x00',
+	'J': b'\x00\x06\x06\x06\x06\x06\x06\x06\x06\x06\x06\x06\x06~|\x00',
+	'S': b'\x00<~````|>\x06\x06\x06\x06~<\x00',
+}
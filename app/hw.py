@@ -1,10 +1,13 @@
 # Author: Marek Jankech
 # Copyright Marek Jankech 2022 Released under the MIT license
 
+import app.boot as boot
 import app.constants as const
 from app.display import Matrix
-from app.clock import RTC
-from app.memory import EEPROM
+from app.clock import RTC, Clock, Thermometer
+from app.memory import EEPROM, ConfigStore
+from app.bus import I2CBus
+from app.journal import ScoreJournal
 from machine import Pin, SPI, I2C
 
 #########################################################################
@@ -15,26 +18,69 @@ from machine import Pin, SPI, I2C
 # can import this module and get access to these instances as singletons.
 #########################################################################
 
-# Real Time Clock & EEPROM config - same I2C bus
-rtc_mem_i2c = I2C(const.RTC_I2C_ID, sda=Pin(const.RTC_I2C_SDA_PIN, Pin.OPEN_DRAIN),
-	scl=Pin(const.RTC_I2C_SCL_PIN, Pin.OPEN_DRAIN), freq=400_000)	
-
-# Display config 
+# Display config - brought up first, the first frame depends only on it
+# and on the state record in the EEPROM
 mx_spi = SPI(const.DISPLAY_SPI_ID, baudrate=const.DISPLAY_SPI_BAUD,
 	polarity=const.DISPLAY_SPI_POLARITY, phase=const.DISPLAY_SPI_PHASE,
 	sck=Pin(const.DISPLAY_SPI_CLK_PIN),
 	mosi=Pin(const.DISPLAY_SPI_MOSI_PIN))
 cs_pin = Pin(const.DISPLAY_SPI_CS_PIN, Pin.OUT)
 
-print("I2C addresses: " + str(rtc_mem_i2c.scan()))
+# Real Time Clock & EEPROM config - same I2C bus
+rtc_mem_i2c = I2C(const.RTC_I2C_ID, sda=Pin(const.RTC_I2C_SDA_PIN, Pin.OPEN_DRAIN),
+	scl=Pin(const.RTC_I2C_SCL_PIN, Pin.OPEN_DRAIN), freq=400_000)	
+# All the transactions on the shared bus go through its manager
+rtc_mem_bus = I2CBus(rtc_mem_i2c)
+
+def print_i2c_devices():
+	"""
+	Not done at import, the scan would delay the first frame.
+	"""
+
+	print("I2C addresses: " + str(rtc_mem_bus.scan()))
 
 ####################################################
 # 3 above mentioned objects representing HW modules.
 ####################################################
 
-# Realt Time Clock
-rtc = RTC(rtc_mem_i2c)
-# Non-volatile memory
-nv_mem = EEPROM(rtc_mem_i2c)
-# LED matrix
-display = Matrix(mx_spi, cs_pin, nv_mem.get_cfg().bright_lvl)
\ No newline at end of file
+# LED matrix - blank until the first frame, the configured brightness
+# is set once the configuration is loaded
+display = Matrix(mx_spi, cs_pin, const.INITIAL_BRIGHTNESS)
+boot.mark("display")
+
+# Non-volatile memory - the persisted score is the first frame
+nv_mem = EEPROM(rtc_mem_bus)
+# Configuration kept in RAM
+cfg_store = ConfigStore(nv_mem)
+display.set_brightness(cfg_store.get().bright_lvl)
+boot.mark("hw")
+
+# Brought up by init_peripherals() after the first frame,
+# access them as attributes of this module
+rtc = None
+clock = None
+thermometer = None
+journal = None
+
+def init_peripherals():
+	"""
+	The Real Time Clock, the thermometer and the score history
+	are not needed for the first frame.
+	"""
+
+	global rtc, clock, thermometer, journal
+	if rtc is not None:
+		return
+
+	# Realt Time Clock
+	rtc = RTC(rtc_mem_bus)
+	# Cached time for the renderers
+	clock = Clock(rtc)
+	if const.CLOCK_TICK_MODE != const.RTC_TICK_NONE:
+		clock.enable_tick(Pin(const.RTC_SQW_PIN, Pin.IN, Pin.PULL_UP),
+			const.CLOCK_TICK_MODE)
+	# Cached temperature for the renderers
+	thermometer = Thermometer(rtc)
+	# Score history
+	journal = ScoreJournal(nv_mem)
+	boot.mark("peripherals")
\ No newline at end of file
@@ -0,0 +1,85 @@
+# Author: Marek Jankech
+# Copyright Marek Jankech 2022 Released under the MIT license
+
+from array import array
+
+import uasyncio as asyncio
+import app.constants as const
+import utime
+
+class InputQueue:
+    """
+    Ring buffer of input events between the IR callback (producer)
+    and a single consumer task. The buffers are preallocated,
+    so :func:`put` does not allocate and is safe in interrupt context.
+
+    Event: button, number of repeat codes (0 for a new push), timestamp.
+    Repeat codes are coalesced into the count of the last queued event,
+    unless that event is the one the consumer may be just reading.
+    """
+
+    def __init__(self, size=const.INPUT_QUEUE_LEN) -> None:
+        self._size = size
+        self._buttons = array('i', (0 for _ in range(size)))
+        self._repeats = array('H', (0 for _ in range(size)))
+        self._times = array('i', (0 for _ in range(size)))
+
+        # Written only by the producer
+        self._head = 0
+        self._last_button = None
+        # Written only by the consumer
+        self._tail = 0
+
+        self.flag = asyncio.ThreadSafeFlag()
+        self.dropped = 0
+
+    def __len__(self):
+        return (self._head - self._tail) % self._size
+
+    def put(self, button, repeat=False):
+        """
+        Called from the IR callback. A repeat code repeats the last pushed button.
+        """
+
+        if repeat:
+            if self._last_button is None:
+                return
+
+            last = (self._head - 1) % self._size
+            if (self._head != self._tail and last != self._tail
+                and self._repeats[last] and self._buttons[last] == self._last_button):
+                self._repeats[last] += 1
+                self.flag.set()
+                return
+
+            button = self._last_button
+        else:
+            self._last_button = button
+
+        next_head = (self._head + 1) % self._size
+        if next_head == self._tail:
+            self.dropped += 1
+            return
+
+        self._buttons[self._head] = button
+        self._repeats[self._head] = 1 if repeat else 0
+        self._times[self._head] = utime.ticks_ms()
+        self._head = next_head
+
+        self.flag.set()
+
+    def get(self):
+        """
+        Return the oldest event as (button, repeats, ticks_ms)
+        or None, if the queue is empty.
+        """
+
+        tail = self._tail
+        if tail == self._head:
+            return None
+
+        event = (self._buttons[tail], self._repeats[tail], self._times[tail])
+        # Release the slot after reading it
+        self._tail = (tail + 1) % self._size
+
+        return event
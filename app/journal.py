@@ -0,0 +1,193 @@
+# Author: Marek Jankech
+# Copyright Marek Jankech 2022 Released under the MIT license
+
+import sys
+import uasyncio as asyncio
+from app.data import Datetime, Score
+from app.memory import EEPROM
+from app.sched import Scheduler, PRIO_BACKGROUND
+
+import app.constants as const
+
+class ScoreJournal:
+    """
+    Append-only journal of score changes stored in a ring buffer
+    on the EEPROM. Writing goes around the whole region,
+    so the wear is spread over all of its pages.
+
+    Record layout (8 bytes, 4 records per page):
+    - sequence number (2 bytes, big endian, the highest bit is always 0,
+      erased memory reads as 0xFFFF)
+    - left score, right score (1 byte each)
+    - timestamp (4 bytes, big endian): year since 2000 (6 bits), month (4),
+      day (5), hours (5), minutes (6), seconds (6)
+    """
+
+    RECORD_LEN = 8
+    SEQ_MASK = 0X7FFF
+    EMPTY_SEQ_BIT = 0X8000
+
+    def __init__(self, nv_mem: EEPROM, start_addr=const.JOURNAL_START_ADDR,
+        end_addr=const.JOURNAL_END_ADDR) -> None:
+        self._nv_mem = nv_mem
+        self._start_addr = start_addr
+        self._slots = (end_addr - start_addr) // self.RECORD_LEN
+
+        self._record = bytearray(self.RECORD_LEN)
+        self._page = bytearray(const.AT24C32_PAGE_LEN)
+        self._seq_buf = memoryview(self._record)[0:2]
+        # The export runs in the background of the rendering
+        self._slice = Scheduler().register("journal export", PRIO_BACKGROUND,
+            const.BACKGROUND_SLICE_BUDGET_MS)
+
+        # Slot for the next record and its sequence number
+        self._head = 0
+        self._next_seq = 0
+        self._count = 0
+
+        self._find_head()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, score: Score, dt: Datetime):
+        rec = self._record
+
+        rec[0] = self._next_seq >> const.ONE_BYTE
+        rec[1] = self._next_seq & 0xFF
+        rec[2] = score.left
+        rec[3] = score.right
+
+        stamp = self._pack_datetime(dt)
+        for i in range(4):
+            rec[7 - i] = (stamp >> (i * const.ONE_BYTE)) & 0xFF
+
+        self._nv_mem.write(self._slot_addr(self._head), rec)
+
+        self._head = (self._head + 1) % self._slots
+        self._next_seq = (self._next_seq + 1) & self.SEQ_MASK
+        if self._count < self._slots:
+            self._count += 1
+
+    def last_seq(self):
+        """
+        Sequence number of the newest record or None, if the journal is empty.
+        """
+
+        if not self._count:
+            return None
+
+        return (self._next_seq - 1) & self.SEQ_MASK
+
+    def read(self, seq) -> Score:
+        """
+        Return the score of the record with the sequence number
+        or None, if the record is not in the journal (anymore).
+        """
+
+        back = (self._next_seq - seq) & self.SEQ_MASK
+        if back < 1 or back > self._count:
+            return None
+
+        slot = (self._head - back) % self._slots
+        self._nv_mem.read_into(self._slot_addr(slot), self._record)
+
+        return Score(self._record[2], self._record[3])
+
+    def clear(self):
+        """
+        Erase the whole journal region. Slow, intended for the REPL.
+        """
+
+        for i in range(len(self._page)):
+            self._page[i] = 0xFF
+
+        for addr in range(self._start_addr,
+            self._start_addr + self._slots * self.RECORD_LEN, len(self._page)):
+            self._nv_mem.write(addr, self._page)
+
+        self._head = 0
+        self._next_seq = 0
+        self._count = 0
+
+    async def export(self, out=sys.stdout):
+        """
+        Stream all the records, the oldest first, to the USB serial console
+        as CSV lines: sequence number, date & time, left score, right score.
+        The records are read by whole pages.
+        """
+
+        out.write("seq,datetime,left,right\n")
+        self._slice.begin()
+
+        slot = (self._head - self._count) % self._slots
+        remaining = self._count
+        page_records = len(self._page) // self.RECORD_LEN
+
+        while remaining:
+            # Read up to the end of the page or of the region
+            cnt = min(page_records - slot % page_records,
+                self._slots - slot, remaining)
+            page = memoryview(self._page)[0:cnt * self.RECORD_LEN]
+            self._nv_mem.read_into(self._slot_addr(slot), page)
+
+            for i in range(0, cnt * self.RECORD_LEN, self.RECORD_LEN):
+                out.write(self._format_record(page[i:i + self.RECORD_LEN]))
+
+            slot = (slot + cnt) % self._slots
+            remaining -= cnt
+
+            # pass execution to other tasks, once the budget is spent
+            await self._slice.checkpoint()
+
+        self._slice.end()
+
+    def _find_head(self):
+        """
+        Slots from the first one up to the head hold consecutive sequence
+        numbers, the next slot is either empty or holds an older record.
+        So the head is found by a binary search, reading just a few records.
+        """
+
+        first_seq = self._read_seq(0)
+        if first_seq & self.EMPTY_SEQ_BIT:
+            return
+
+        low = 1
+        high = self._slots
+        while low < high:
+            mid = (low + high) // 2
+            if self._read_seq(mid) == (first_seq + mid) & self.SEQ_MASK:
+                low = mid + 1
+            else:
+                high = mid
+
+        self._next_seq = (first_seq + low) & self.SEQ_MASK
+        self._head = low % self._slots
+
+        if low == self._slots or not (
+            self._read_seq(self._head) & self.EMPTY_SEQ_BIT):
+            self._count = self._slots
+        else:
+            self._count = low
+
+    def _read_seq(self, slot) -> int:
+        self._nv_mem.read_into(self._slot_addr(slot), self._seq_buf)
+
+        return (self._seq_buf[0] << const.ONE_BYTE) | self._seq_buf[1]
+
+    def _slot_addr(self, slot) -> int:
+        return self._start_addr + slot * self.RECORD_LEN
+
+    def _pack_datetime(self, dt: Datetime) -> int:
+        return ((dt.year - const.MILLENIUM) << 26 | dt.month << 22
+            | dt.date << 17 | dt.hours << 12 | dt.minutes << 6 | dt.seconds)
+
+    def _format_record(self, rec) -> str:
+        seq = (rec[0] << const.ONE_BYTE) | rec[1]
+        stamp = (rec[4] << 24) | (rec[5] << 16) | (rec[6] << 8) | rec[7]
+
+        return "{},{:04d}-{:02d}-{:02d} {:02d}:{:02d}:{:02d},{},{}\n".format(
+            seq, (stamp >> 26) + const.MILLENIUM, (stamp >> 22) & 0x0F,
+            (stamp >> 17) & 0x1F, (stamp >> 12) & 0x1F, (stamp >> 6) & 0x3F,
+            stamp & 0x3F, rec[2], rec[3])
@@ -1,6 +1,16 @@
 # Author: Marek Jankech
 # Copyright Marek Jankech 2022 Released under the MIT license
 
+def set_pixel(bitmap, width: int, height: int, x: int, y: int):
+	"""
+	Set a pixel in a bitmap with MONO_HLSB layout (the same layout
+	as the matrix framebuffer uses). Pixels outside of the bitmap are clipped.
+	"""
+
+	if 0 <= x < width and 0 <= y < height:
+		bitmap[y * ((width + 7) // 8) + (x >> 3)] |= 0x80 >> (x & 7)
+
+
 class HorizontalLine:
 	def __init__(self, start_x: int, start_y: int, width: int):
 		"""
@@ -13,14 +23,12 @@ class HorizontalLine:
 		self.y = start_y
 		self.width = width
 
-	def copy(self):
-		return HorizontalLine(self.x, self.y, self.width)
+	def render(self, framebuf, x=0, y=0):
+		framebuf.hline(self.x + x, self.y + y, self.width, 1)
 
-	def x_shift(self, x_offset: int):
-		self.x += x_offset
-
-	def render(self, framebuf):
-		framebuf.hline(self.x, self.y, self.width, 1)
+	def rasterise(self, bitmap, width: int, height: int):
+		for x in range(self.x, self.x + self.width):
+			set_pixel(bitmap, width, height, x, self.y)
 
 
 class VerticalLine:
@@ -35,11 +43,9 @@ class VerticalLine:
 		self.y = start_y
 		self.height = height
 
-	def copy(self):
-		return VerticalLine(self.x, self.y, self.height)
-
-	def x_shift(self, x_offset: int):
-		self.x += x_offset
+	def render(self, framebuf, x=0, y=0):
+		framebuf.vline(self.x + x, self.y + y, self.height, 1)
 
-	def render(self, framebuf):
-		framebuf.vline(self.x, self.y, self.height, 1)
+	def rasterise(self, bitmap, width: int, height: int):
+		for y in range(self.y, self.y + self.height):
+			set_pixel(bitmap, width, height, self.x, y)
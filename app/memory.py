@@ -1,33 +1,195 @@
 # Author: Marek Jankech
 # Copyright Marek Jankech 2022 Released under the MIT license
 
+import uasyncio as asyncio
 import utime
-from machine import I2C
+from app.bus import I2CBus
 from app.data import Config, Score
 
 import app.constants as const
 
+def crc16(data, start, length) -> int:
+    """
+    CRC-16/CCITT-FALSE of the data slice.
+    """
+
+    crc = 0xFFFF
+
+    for i in range(start, start + length):
+        crc ^= data[i] << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ 0x1021) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+
+    return crc
+
+
 class EEPROM:
-    def __init__(self, i2c: I2C) -> None:
+    # A/B copies of the state record, each one on its own page
+    STATE_ADDRS = (const.STATE_A_ADDR, const.STATE_B_ADDR)
+
+    def __init__(self, i2c: I2CBus) -> None:
         self.i2c = i2c
+
+        # An internal write cycle may be in progress
+        self._busy = False
+
+        # RAM shadow of the used region of the memory. All reads are served
+        # from it, changed pages are written back later, all at once.
+        self._shadow = bytearray(const.AT24C32_SHADOW_LEN)
+        self._page_mvs = tuple(
+            memoryview(self._shadow)[addr:addr + const.AT24C32_PAGE_LEN]
+            for addr in range(0, const.AT24C32_SHADOW_LEN, const.AT24C32_PAGE_LEN))
+        self._dirty_pages = 0
+        self._last_change = utime.ticks_ms()
+        self._dirty_flag = asyncio.ThreadSafeFlag()
+
+        self.i2c.readfrom_mem_into(
+            const.AT24C32_I2C_ADDR, 0, self._shadow, addrsize=16)
+
+        # Versioned state record with config and score
+        self._state = bytearray(const.STATE_RECORD_LEN)
+        self._state_slot = 0
+        self._state_dirty = False
+        self._load_state()
         
     def get_cfg(self) -> Config:
-        cfg_byte = self.i2c.readfrom_mem(
-            const.AT24C32_I2C_ADDR, const.CFG_ADDR, 1, addrsize=16)
-        cfg_raw_val = cfg_byte[0]
+        flags = self._state[const.STATE_CFG_IDX]
         
-        use_score = bool(cfg_raw_val & const.USE_SCORE_CFG_MASK)
-        use_date = bool(cfg_raw_val & const.USE_DATE_CFG_MASK)
-        use_time = bool(cfg_raw_val & const.USE_TIME_CFG_MASK)
-        use_temperature = bool(cfg_raw_val & const.USE_TEMPERATURE_CFG_MASK)
-        scroll = bool(cfg_raw_val & const.SCROLL_CFG_MASK)
-        bright_lvl = (cfg_raw_val & const.BRIGHT_LVL_CFG_MASK) \
-            >> const.BRIGHT_LVL_BIT_SHIFT
+        use_score = bool(flags & const.USE_SCORE_CFG_MASK)
+        use_date = bool(flags & const.USE_DATE_CFG_MASK)
+        use_time = bool(flags & const.USE_TIME_CFG_MASK)
+        use_temperature = bool(flags & const.USE_TEMPERATURE_CFG_MASK)
+        scroll = bool(flags & const.SCROLL_CFG_MASK)
+        bright_lvl = self._state[const.STATE_BRIGHT_LVL_IDX]
 
         return Config(
             use_score, use_date, use_time, use_temperature, scroll, bright_lvl)
 
     def save_cfg(self, cfg: Config):
+        """
+        The config is written to the memory later by :func:`run`
+        or by :func:`commit`.
+        """
+
+        self._set_state(const.STATE_CFG_IDX, self._encode_cfg_flags(cfg))
+        self._set_state(const.STATE_BRIGHT_LVL_IDX,
+            cfg.bright_lvl & const.BRIGHT_LVL_MAX)
+
+    async def save_cfg_async(self, cfg: Config):
+        self.save_cfg(cfg)
+        await self.commit_async()
+
+    def get_last_score(self) -> Score:
+        return Score(self._state[const.STATE_LEFT_SCORE_IDX],
+            self._state[const.STATE_RIGHT_SCORE_IDX])
+
+    def save_last_score(self, score: Score):
+        """
+        The score is written to the memory later by :func:`run`
+        or by :func:`commit`.
+        """
+
+        self._set_state(const.STATE_LEFT_SCORE_IDX, score.left)
+        self._set_state(const.STATE_RIGHT_SCORE_IDX, score.right)
+
+    async def save_last_score_async(self, score: Score):
+        self.save_last_score(score)
+        await self.commit_async()
+
+    def commit(self):
+        """
+        Write all the changed pages to the memory right now.
+        """
+
+        self._stage_state()
+
+        for page_idx in range(len(self._page_mvs)):
+            if self._take_dirty_page(page_idx):
+                self._write_page(page_idx)
+
+        self.wait_ready()
+
+    async def commit_async(self):
+        """
+        The pages are written as background transactions,
+        the other bus requests go first.
+        """
+
+        self._stage_state()
+
+        for page_idx in range(len(self._page_mvs)):
+            if self._take_dirty_page(page_idx):
+                await self.wait_ready_async()
+
+                await self.i2c.acquire(I2CBus.PRIO_LOW)
+                try:
+                    self._write_page(page_idx)
+                finally:
+                    self.i2c.release()
+
+        await self.wait_ready_async()
+
+    async def run(self):
+        """
+        Write the changed pages back, once there were no other changes
+        for the debounce period. Rapid changes are collapsed
+        into one physical write.
+        """
+
+        while True:
+            await self._dirty_flag.wait()
+
+            while True:
+                remaining = const.AT24C32_FLUSH_DEBOUNCE_MS - utime.ticks_diff(
+                    utime.ticks_ms(), self._last_change)
+                if remaining <= 0:
+                    break
+                await asyncio.sleep_ms(remaining)
+
+            await self.commit_async()
+
+    def is_ready(self) -> bool:
+        """
+        Acknowledge polling. The memory does not acknowledge its address
+        until the internal write cycle is complete.
+        """
+
+        try:
+            self.i2c.writeto(const.AT24C32_I2C_ADDR, b'')
+        except OSError:
+            return False
+
+        return True
+
+    def wait_ready(self):
+        if not self._busy:
+            return
+
+        t_start = utime.ticks_ms()
+        while not self.is_ready():
+            if utime.ticks_diff(utime.ticks_ms(), t_start) \
+                > const.AT24C32_WRITE_TIMEOUT_MS:
+                break
+
+        self._busy = False
+
+    async def wait_ready_async(self):
+        if not self._busy:
+            return
+
+        t_start = utime.ticks_ms()
+        while not self.is_ready():
+            if utime.ticks_diff(utime.ticks_ms(), t_start) \
+                > const.AT24C32_WRITE_TIMEOUT_MS:
+                break
+            await asyncio.sleep_ms(const.AT24C32_ACK_POLL_MS)
+
+        self._busy = False
+
+    def _encode_cfg_flags(self, cfg: Config) -> int:
         val = 0
         if cfg.use_score:
             val |= const.USE_SCORE_CFG_MASK
@@ -39,33 +201,179 @@ class EEPROM:
             val |= const.USE_TEMPERATURE_CFG_MASK
         if cfg.scroll:
             val |= const.SCROLL_CFG_MASK
-        val |= (cfg.bright_lvl << const.BRIGHT_LVL_BIT_SHIFT) \
-            & const.BRIGHT_LVL_CFG_MASK
 
-        self.i2c.writeto_mem(const.AT24C32_I2C_ADDR, const.CFG_ADDR,
-            self._tobyte(val), addrsize=16)
+        return val
 
-        utime.sleep_ms(20) # small pause after each write
+    def _set_state(self, idx, val):
+        if self._state[idx] == val:
+            return
 
-    def get_last_score(self) -> Score:
-        cfg_byte = self.i2c.readfrom_mem(
-            const.AT24C32_I2C_ADDR, const.LAST_SCORE_ADDR, 1, addrsize=16)
-        cfg_raw_val = cfg_byte[0]
+        self._state[idx] = val
+        self._state_dirty = True
+        self._last_change = utime.ticks_ms()
+        self._dirty_flag.set()
 
-        left_score = (cfg_raw_val & const.LEFT_SCORE_MASK) \
-            >> const.LEFT_SCORE_BIT_SHIFT
-        right_score = cfg_raw_val & const.RIGHT_SCORE_MASK
+    def _load_state(self):
+        """
+        Pick the newest valid copy of the state record. If there is none,
+        migrate the former single-byte layout.
+        """
 
-        return Score(left_score, right_score)
+        newest_slot = None
 
-    def save_last_score(self, score: Score):
-        val = score.right & const.RIGHT_SCORE_MASK
-        val |= (score.left << const.LEFT_SCORE_BIT_SHIFT) & const.LEFT_SCORE_MASK
+        for slot, addr in enumerate(self.STATE_ADDRS):
+            if not self._is_valid_record(addr):
+                continue
+            if newest_slot is None or self._is_newer(addr,
+                self.STATE_ADDRS[newest_slot]):
+                newest_slot = slot
+
+        if newest_slot is None:
+            self._migrate()
+            return
+
+        addr = self.STATE_ADDRS[newest_slot]
+        self._state[:] = self._shadow[addr:addr + const.STATE_RECORD_LEN]
+        self._state_slot = newest_slot
+
+    def _is_valid_record(self, addr) -> bool:
+        if self._shadow[addr + const.STATE_VERSION_IDX] != const.STATE_VERSION:
+            return False
+
+        crc = (self._shadow[addr + const.STATE_CRC_IDX] << const.ONE_BYTE) \
+            | self._shadow[addr + const.STATE_CRC_IDX + 1]
+
+        return crc == crc16(self._shadow, addr, const.STATE_CRC_IDX)
+
+    def _is_newer(self, addr, other_addr) -> bool:
+        """
+        The generation counter wraps around, compare it as a serial number.
+        """
+
+        diff = (self._shadow[addr + const.STATE_GENERATION_IDX]
+            - self._shadow[other_addr + const.STATE_GENERATION_IDX]) & 0xFF
+
+        return 0 < diff < 0x80
+
+    def _migrate(self):
+        """
+        Convert the former layout - config byte at CFG_ADDR
+        (3 bits of brightness) and score byte at LAST_SCORE_ADDR
+        (4 bits per side) - into the state record.
+        """
+
+        cfg_raw_val = self._shadow[const.CFG_ADDR]
+        score_raw_val = self._shadow[const.LAST_SCORE_ADDR]
+
+        self._state[const.STATE_VERSION_IDX] = const.STATE_VERSION
+        self._state[const.STATE_GENERATION_IDX] = 0
+        self._state[const.STATE_CFG_IDX] = cfg_raw_val \
+            & ~const.BRIGHT_LVL_CFG_MASK
+        self._state[const.STATE_BRIGHT_LVL_IDX] = (cfg_raw_val
+            & const.BRIGHT_LVL_CFG_MASK) >> const.BRIGHT_LVL_BIT_SHIFT
+        self._state[const.STATE_LEFT_SCORE_IDX] = (score_raw_val
+            & const.LEFT_SCORE_MASK) >> const.LEFT_SCORE_BIT_SHIFT
+        self._state[const.STATE_RIGHT_SCORE_IDX] = score_raw_val \
+            & const.RIGHT_SCORE_MASK
+
+        # The first record goes to the copy A
+        self._state_slot = len(self.STATE_ADDRS) - 1
+        self._state_dirty = True
+        self.commit()
+
+    def _stage_state(self):
+        """
+        Put the changed state record into the shadow, over the older copy,
+        so the newest good copy always survives an interrupted write.
+        """
+
+        if not self._state_dirty:
+            return
+        self._state_dirty = False
+
+        self._state[const.STATE_GENERATION_IDX] = \
+            (self._state[const.STATE_GENERATION_IDX] + 1) & 0xFF
+        crc = crc16(self._state, 0, const.STATE_CRC_IDX)
+        self._state[const.STATE_CRC_IDX] = crc >> const.ONE_BYTE
+        self._state[const.STATE_CRC_IDX + 1] = crc & 0xFF
+
+        self._state_slot = (self._state_slot + 1) % len(self.STATE_ADDRS)
+        addr = self.STATE_ADDRS[self._state_slot]
+        self._shadow[addr:addr + const.STATE_RECORD_LEN] = self._state
+        self._dirty_pages |= 1 << (addr // const.AT24C32_PAGE_LEN)
+
+    def _take_dirty_page(self, page_idx) -> bool:
+        """
+        Clear the dirty flag of the page before writing it,
+        so that a change made meanwhile is written again.
+        """
+
+        page_mask = 1 << page_idx
+        if not self._dirty_pages & page_mask:
+            return False
+
+        self._dirty_pages &= ~page_mask
+        return True
+
+    def _write_page(self, page_idx):
+        self.write(page_idx * const.AT24C32_PAGE_LEN, self._page_mvs[page_idx])
+
+    def read_into(self, addr, buf):
+        """
+        Read directly from the memory, bypassing the RAM shadow.
+        Intended for the region beyond the shadowed one.
+        """
+
+        self.wait_ready()
+
+        self.i2c.readfrom_mem_into(
+            const.AT24C32_I2C_ADDR, addr, buf, addrsize=16)
+
+    def write(self, addr, buf):
+        """
+        Write directly to the memory, bypassing the RAM shadow.
+        The data must not cross a page boundary.
+        """
+
+        self.wait_ready()
+
+        self.i2c.writeto_mem(const.AT24C32_I2C_ADDR, addr, buf, addrsize=16)
+        self._busy = True
+
+
+class ConfigStore:
+    def __init__(self, nv_mem: EEPROM) -> None:
+        """
+        Keeps the configuration in RAM. It is read from the non-volatile
+        memory just once, every change is written through and
+        the subscribers are notified about it.
+        """
+
+        self._nv_mem = nv_mem
+        self._cfg = nv_mem.get_cfg()
+        self._subscribers = []
+
+    def get(self) -> Config:
+        """
+        The returned config is shared, change it only by :func:`set`.
+        """
+
+        return self._cfg
+
+    def set(self, field: str, value):
+        if getattr(self._cfg, field) == value:
+            return
+
+        setattr(self._cfg, field, value)
+        self._nv_mem.save_cfg(self._cfg)
 
-        self.i2c.writeto_mem(const.AT24C32_I2C_ADDR, const.LAST_SCORE_ADDR,
-            self._tobyte(val), addrsize=16)
+        for callback in self._subscribers:
+            callback(field, value)
 
-        utime.sleep_ms(20) # small pause after each write
+    def subscribe(self, callback):
+        """
+        The callback is called with the name and the new value
+        of a changed field.
+        """
 
-    def _tobyte(self, num: int):
-        return num.to_bytes(1, 'little')
\ No newline at end of file
+        self._subscribers.append(callback)
@@ -4,7 +4,9 @@
 import app.font as mx_font
 import app.constants as const
 from app.data import Score
-from app.hw import nv_mem, rtc, display
+from app.hw import nv_mem, cfg_store, display
+import app.hw as hw
+from app.journal import ScoreJournal
 from app.decorator import singleton
 
 class MxRenderable:
@@ -16,6 +18,21 @@ class MxRenderable:
     def render(self, x_shift=0, pre_clear=True, redraw=True):
         pass
 
+    def render_strip(self, x_shift=0):
+        """
+        Render the part of the information, which moves during scrolling.
+        """
+
+        self.render(x_shift, False, False)
+
+    def state(self):
+        """
+        Return the value the rendered information depends on.
+        Pre-rendered content must be rendered again, when it changes.
+        """
+
+        return None
+
 class MxNumeric(MxRenderable):
     """
     Represents a numeric information that could be directly rendered
@@ -25,14 +42,20 @@ class MxNumeric(MxRenderable):
     def __init__(self):
         self._matrix = display
 
+    @staticmethod
+    def _clamp(val, min_val, max_val):
+        if val > max_val:
+            return max_val
+        if val < min_val:
+            return min_val
+        return val
+
     def _render_2_digit_num(self, num, x_shift=0):
         (tens, ones) = divmod(num, 10)
         ft = mx_font.Medium()
 
         for digit in [tens, ones]:
-            char = ft.get(str(digit))
-            char.x_shift(x_shift)
-            char.render(self._matrix.fb)
+            ft.get_glyph(str(digit)).render(self._matrix.fb, x_shift)
 
             x_shift += const.COLS_IN_MATRIX
 
@@ -74,9 +97,7 @@ class MxScore(MxNumeric):
 
             font = mx_font.BigDigit()
 
-            renderable = font.get(self._digit)
-            renderable.x_shift(offset)
-            renderable.render(self._matrix.fb)
+            font.get_glyph(self._digit).render(self._matrix.fb, offset)
 
     class SingleTwoDigit(MxRenderable):
         """
@@ -111,13 +132,8 @@ class MxScore(MxNumeric):
 
             font = mx_font.BigDigit()
 
-            renderable_ones = font.get(self._tens)
-            renderable_ones.x_shift(tens_offset)
-            renderable_ones.render(self._matrix.fb)
-
-            renderable_ones = font.get(self._ones)
-            renderable_ones.x_shift(ones_offset)
-            renderable_ones.render(self._matrix.fb)
+            font.get_glyph(self._tens).render(self._matrix.fb, tens_offset)
+            font.get_glyph(self._ones).render(self._matrix.fb, ones_offset)
 
     class SingleHigherTwoDigit(MxNumeric):
         """
@@ -148,56 +164,107 @@ class MxScore(MxNumeric):
         super().__init__()
 
         self._nv_mem = nv_mem
-        self._last_changed = const.LEFT_AND_RIGHT
+        # Set by open_journal(), once the peripherals are up
+        self._journal = None
+        self._clock = None
+        # Immutable snapshot (left, right, last changed side). The writers
+        # replace it as a whole, the renderers read it once per frame,
+        # so a frame never mixes an old and a new value.
+        self._snapshot = (0, 0, const.LEFT_AND_RIGHT)
+        # Scratch record for the non-volatile memory
+        self._score = Score(0, 0)
+        # Sequence number of the journal record the last revert went back to
+        self._revert_seq = None
+
+        # The state record is enough for the first frame
+        score = self._nv_mem.get_last_score()
+        self._publish(score.left, score.right, self._snapshot[2])
+
+    def open_journal(self):
+        """
+        Take over the score history, the peripherals must be initialized.
+        """
 
+        self._journal = hw.journal
+        self._clock = hw.clock
         self.load()
 
-        self._prev_score = Score(self._score.left, self._score.right)
+        if not len(self._journal):
+            self._journal.append(self._record(), self._clock.now())
 
     def revert(self):
-        if self._last_changed == const.LEFT:
-            self._score.left = self._prev_score.left
-        elif self._last_changed == const.RIGHT:
-            self._score.right = self._prev_score.right
-        else:
-            self._score.left = self._prev_score.left
-            self._score.right = self._prev_score.right
+        """
+        Undo one step of the score history. Successive calls
+        go further back in the journal. The reverted score is appended
+        to the journal as a new record.
+        """
 
-        self.save()
+        seq = self._get_revert_seq()
+        prev_score = None if seq is None else self._journal.read(seq)
 
-    def reset(self):
-        self._last_changed = const.LEFT_AND_RIGHT
+        if prev_score is None:
+            return
+
+        self._publish(prev_score.left, prev_score.right,
+            self._get_changed_side(prev_score))
+        self._store()
+
+        self._revert_seq = seq
+
+    def get_revert_side(self):
+        """
+        Side of the score, which would be changed by :func:`revert`.
+        """
+
+        seq = self._get_revert_seq()
+        prev_score = None if seq is None else self._journal.read(seq)
+
+        if prev_score is None:
+            return const.LEFT_AND_RIGHT
+
+        return self._get_changed_side(prev_score)
+
+    def _get_revert_seq(self):
+        seq = self._revert_seq
+        if seq is None:
+            seq = self._journal.last_seq()
+        if seq is None:
+            return None
 
-        self._score.left = 0
-        self._score.right = 0
+        return (seq - 1) & ScoreJournal.SEQ_MASK
+
+    def _get_changed_side(self, other: Score):
+        left, right, _ = self._snapshot
+        left_changed = other.left != left
+        right_changed = other.right != right
+
+        if left_changed and not right_changed:
+            return const.LEFT
+        if right_changed and not left_changed:
+            return const.RIGHT
+        return const.LEFT_AND_RIGHT
+
+    def reset(self):
+        self._publish(0, 0, const.LEFT_AND_RIGHT)
 
         self.save()
 
     def set_score(self, l_val, r_val):
-        self._last_changed = const.LEFT_AND_RIGHT
-
-        self.set_left(l_val)
-        self.set_right(r_val)
+        self._publish(l_val, r_val, const.LEFT_AND_RIGHT)
 
     def set_left(self, val):
-        self._last_changed = const.LEFT
-
-        if val > self.MAX_SCORE:
-            self._score.left = self.MAX_SCORE
-        elif val < self.MIN_SCORE:
-            self._score.left = self.MIN_SCORE
-        else:
-            self._score.left = val
+        self._publish(val, self._snapshot[1], const.LEFT)
 
     def set_right(self, val):
-        self._last_changed = const.RIGHT
+        self._publish(self._snapshot[0], val, const.RIGHT)
 
-        if val > self.MAX_SCORE:
-            self._score.right = self.MAX_SCORE
-        elif val < self.MIN_SCORE:
-            self._score.right = self.MIN_SCORE
-        else:
-            self._score.right = val
+    def _publish(self, left, right, side):
+        """
+        Replace the snapshot by a new one with the values clamped.
+        """
+
+        self._snapshot = (self._clamp(left, self.MIN_SCORE, self.MAX_SCORE),
+            self._clamp(right, self.MIN_SCORE, self.MAX_SCORE), side)
 
     def incr_left(self):
         """
@@ -205,7 +272,7 @@ class MxScore(MxNumeric):
         and save current score to the non-volatile memory.
         """
 
-        self.set_left(self._score.left + 1)
+        self.set_left(self._snapshot[0] + 1)
 
     def decr_left(self):
         """
@@ -213,7 +280,7 @@ class MxScore(MxNumeric):
         and save current score to the non-volatile memory.
         """
 
-        self.set_left(self._score.left - 1)
+        self.set_left(self._snapshot[0] - 1)
     
     def incr_right(self):
         """
@@ -221,7 +288,7 @@ class MxScore(MxNumeric):
         and save current score to the non-volatile memory.
         """
 
-        self.set_right(self._score.right + 1)
+        self.set_right(self._snapshot[1] + 1)
 
     def decr_right(self):
         """
@@ -229,36 +296,68 @@ class MxScore(MxNumeric):
         and save current score to the non-volatile memory.
         """
 
-        self.set_right(self._score.right - 1)
+        self.set_right(self._snapshot[1] - 1)
 
     def get_last_changed_side(self):
-        return self._last_changed
+        return self._snapshot[2]
 
     def load(self):
         """
         Fetch the score from the non-volatile memory.
+        The journal keeps the full width score, so it is preferred.
         """
 
-        self._score = self._nv_mem.get_last_score()
+        last_seq = self._journal.last_seq()
+        if last_seq is not None:
+            score = self._journal.read(last_seq)
+        else:
+            score = self._nv_mem.get_last_score()
+
+        self._publish(score.left, score.right, self._snapshot[2])
 
     def save(self):
         """
         Confirm score and save it to the non-volatile memory.
         """
 
-        self._prev_score = self._nv_mem.get_last_score()
-        self._nv_mem.save_last_score(self._score)
+        self._revert_seq = None
+        self._store()
+
+    async def export(self):
+        """
+        Stream the whole match log to the USB serial console.
+        """
+
+        await self._journal.export()
+
+    def _record(self) -> Score:
+        score = self._score
+        score.left, score.right, _ = self._snapshot
+
+        return score
+
+    def _store(self):
+        score = self._record()
+
+        self._nv_mem.save_last_score(score)
+        self._journal.append(score, self._clock.now())
+
+    def state(self):
+        return self._snapshot
 
     def render(self, x_shift=0, pre_clear=True, redraw=True):
+        # One read of the snapshot per frame
+        left, right, _ = self._snapshot
+
         if pre_clear:
             self._matrix.fill(0)
 
-        (l_tens, l_ones) = divmod(self._score.left, 10)
-        (r_tens, r_ones) = divmod(self._score.right, 10)
+        (l_tens, l_ones) = divmod(left, 10)
+        (r_tens, r_ones) = divmod(right, 10)
 
         if l_tens > self.ONE_TENS_DIGIT or r_tens > self.ONE_TENS_DIGIT:
-            l_score = self.SingleHigherTwoDigit(self._score.left, const.LEFT)
-            r_score = self.SingleHigherTwoDigit(self._score.right, const.RIGHT)
+            l_score = self.SingleHigherTwoDigit(left, const.LEFT)
+            r_score = self.SingleHigherTwoDigit(right, const.RIGHT)
         else:
             if l_tens == self.ZERO_TENS_DIGIT:
                 l_score = self.SingleOneDigit(l_ones, const.LEFT)
@@ -299,116 +398,108 @@ class MxDate(MxNumeric):
     def __init__(self) -> None:
         super().__init__()
 
-        self._rtc = rtc
+        self._rtc = hw.rtc
+        self._clock = hw.clock
+        # Immutable snapshot (day, month, year), replaced as a whole
+        self._snapshot = (self.MIN_DAY, self.MIN_MONTH, self.MIN_YEAR)
         self.pull()
 
     def set_date(self, month, day, year=None):
-        self.set_day(day)
-        self.set_month(month)
+        if year is None:
+            year = self._snapshot[2]
 
+        self._publish(day, month, year)
         self.validate_max_days()
 
-        if year is not None:
-            self.set_year(year)
-
     def set_month(self, month):
-        if month > self.MAX_MONTH:
-            self._month = self.MAX_MONTH
-        elif month < self.MIN_MONTH:
-            self._month = self.MIN_MONTH
-        else:
-            self._month = month
+        day, _, year = self._snapshot
+        self._publish(day, month, year)
 
     def set_day(self, day):
-        if day > self.MAX_DAY:
-            self._day = self.MAX_DAY
-        elif day < self.MIN_DAY:
-            self._day = self.MIN_DAY
-        else:
-            self._day = day
+        _, month, year = self._snapshot
+        self._publish(day, month, year)
 
     def set_year(self, year):
-        if year > self.MAX_YEAR:
-            self._year = self.MAX_YEAR
-        elif year < self.MIN_YEAR:
-            self._year = self.MIN_YEAR
-        else:
-            self._year = year
+        day, month, _ = self._snapshot
+        self._publish(day, month, year)
+
+    def _publish(self, day, month, year):
+        """
+        Replace the snapshot by a new one with the values clamped.
+        """
+
+        self._snapshot = (self._clamp(day, self.MIN_DAY, self.MAX_DAY),
+            self._clamp(month, self.MIN_MONTH, self.MAX_MONTH),
+            self._clamp(year, self.MIN_YEAR, self.MAX_YEAR))
 
     def validate_max_days(self):
-        if self._month in self.MONTHS_WITH_30_DAYS and self._day >= self.MAX_DAY:
-            self._day = self.MAX_DAY_30
+        day, month, year = self._snapshot
+
+        if month in self.MONTHS_WITH_30_DAYS and day >= self.MAX_DAY:
+            self._snapshot = (self.MAX_DAY_30, month, year)
 
     def incr_month(self):
         """
         Cyclic month increment.
         """
 
-        if self._month == self.MAX_MONTH:
-            self._month = self.MIN_MONTH
-        else:
-            self._month += 1
+        day, month, year = self._snapshot
+        month = self.MIN_MONTH if month == self.MAX_MONTH else month + 1
+        self._snapshot = (day, month, year)
     
     def decr_month(self):
         """
         Cyclic month decrement.
         """
 
-        if self._month == self.MIN_MONTH:
-            self._month = self.MAX_MONTH
-        else:
-            self._month -= 1
+        day, month, year = self._snapshot
+        month = self.MAX_MONTH if month == self.MIN_MONTH else month - 1
+        self._snapshot = (day, month, year)
 
     def incr_day(self):
         """
         Cyclic day increment.
         """
         
-        if self._day == self.MAX_DAY:
-            self._day = self.MIN_DAY
-        else:
-            self._day += 1
+        day, month, year = self._snapshot
+        day = self.MIN_DAY if day == self.MAX_DAY else day + 1
+        self._snapshot = (day, month, year)
 
     def decr_day(self):
         """
         Cyclic day decrement.
         """
 
-        if self._day == self.MIN_DAY:
-            self._day = self.MAX_DAY
-        else:
-            self._day -= 1
+        day, month, year = self._snapshot
+        day = self.MAX_DAY if day == self.MIN_DAY else day - 1
+        self._snapshot = (day, month, year)
 
     def incr_year(self):
         """
         Cyclic year increment.
         """
 
-        if self._year == self.MAX_YEAR:
-            self._year = self.MIN_YEAR
-        else:
-            self._year += 1
+        day, month, year = self._snapshot
+        year = self.MIN_YEAR if year == self.MAX_YEAR else year + 1
+        self._snapshot = (day, month, year)
 
     def decr_year(self):
         """
         Cyclic year decrement.
         """
 
-        if self._year == self.MIN_YEAR:
-            self._year = self.MAX_YEAR
-        else:
-            self._year -= 1
+        day, month, year = self._snapshot
+        year = self.MAX_YEAR if year == self.MIN_YEAR else year - 1
+        self._snapshot = (day, month, year)
 
     def pull(self):
         """
-        Fetch the date from the Real Time Clock module.
+        Fetch the date from the cached Real Time Clock snapshot.
         """
 
-        datetime = self._rtc.get_time()
+        datetime = self._clock.now()
 
-        self._day = datetime.date
-        self._month = datetime.month
-        self._year = datetime.year
+        self._snapshot = (datetime.date, datetime.month, datetime.year)
 
     def push(self):
         """
@@ -418,11 +509,9 @@ class MxDate(MxNumeric):
 
         datetime = self._rtc.get_time()
 
-        datetime.month = self._month
-        datetime.date = self._day
-        datetime.year = self._year
+        datetime.date, datetime.month, datetime.year = self._snapshot
 
-        self._rtc.set_time(datetime)
+        self._clock.set_time(datetime)
 
     def render_setting(self):
         """
@@ -430,10 +519,12 @@ class MxDate(MxNumeric):
         This is intended for rendering just during date setting.
         """
 
+        day, month, year = self._snapshot
+
         self._matrix.fill(0)
 
-        self._matrix.text("{:02d}{:02d}".format(self._day, self._month), 0, 0)
-        self._matrix.text(str(self._year), 0, 8)
+        self._matrix.text("{:02d}{:02d}".format(day, month), 0, 0)
+        self._matrix.text(str(year), 0, 8)
 
         self._render_date_setting_ordinal_dots(0)
 
@@ -443,6 +534,11 @@ class MxDate(MxNumeric):
         self._matrix.pixel(15 + x_shift, 7, 1)
         self._matrix.pixel(31 + x_shift, 7, 1)
 
+    def state(self):
+        self.pull()
+
+        return self._snapshot
+
     def render(self, x_shift=0, pre_clear=True, redraw=True):
         """
         Render the day and month with their ordinal dots. No year rendering.
@@ -450,13 +546,14 @@ class MxDate(MxNumeric):
         """
 
         self.pull()
+        day, month, _ = self._snapshot
 
         if pre_clear:
             self._matrix.fill(0)
 
-        self._render_2_digit_num(self._day, x_shift)
+        self._render_2_digit_num(day, x_shift)
         self._render_ordinal_dot(x_shift)
-        self._render_2_digit_num(self._month, x_shift + self.DAY_X_SHIFT)
+        self._render_2_digit_num(month, x_shift + self.DAY_X_SHIFT)
         self._render_ordinal_dot(x_shift + self.DAY_ORDINAL_DOT_X_SHIFT)
 
         if redraw:
@@ -477,78 +574,75 @@ class MxTime(MxNumeric):
     def __init__(self) -> None:
         super().__init__()
         
-        self._rtc = rtc
+        self._rtc = hw.rtc
+        self._clock = hw.clock
+        # Immutable snapshot (hours, minutes), replaced as a whole
+        self._snapshot = (self.MIN_HOURS, self.MIN_MINUTES)
         self.pull()
 
     def set_time(self, hours, minutes):
-        self.set_hours(hours)
-        self.set_minutes(minutes)
+        self._publish(hours, minutes)
 
     def set_hours(self, hours):
-        if hours > self.MAX_HOURS:
-            self._hours = self.MAX_HOURS
-        elif hours < self.MIN_HOURS:
-            self._hours = self.MIN_HOURS
-        else:
-            self._hours = hours
+        self._publish(hours, self._snapshot[1])
 
     def set_minutes(self, minutes):
-        if minutes > self.MAX_MINUTES:
-            self._minutes = self.MAX_MINUTES
-        elif minutes < self.MIN_MINUTES:
-            self._minutes = self.MIN_MINUTES
-        else:
-            self._minutes = minutes
+        self._publish(self._snapshot[0], minutes)
+
+    def _publish(self, hours, minutes):
+        """
+        Replace the snapshot by a new one with the values clamped.
+        """
+
+        self._snapshot = (self._clamp(hours, self.MIN_HOURS, self.MAX_HOURS),
+            self._clamp(minutes, self.MIN_MINUTES, self.MAX_MINUTES))
     
     def incr_hour(self):
         """
         Cyclic hour increment.
         """
 
-        if self._hours == self.MAX_HOURS:
-            self._hours = self.MIN_HOURS
-        else:
-            self._hours += 1
+        hours, minutes = self._snapshot
+        hours = self.MIN_HOURS if hours == self.MAX_HOURS else hours + 1
+        self._snapshot = (hours, minutes)
     
     def decr_hour(self):
         """
         Cyclic hour decrement.
         """
 
-        if self._hours == self.MIN_HOURS:
-            self._hours = self.MAX_HOURS
-        else:
-            self._hours -= 1
+        hours, minutes = self._snapshot
+        hours = self.MAX_HOURS if hours == self.MIN_HOURS else hours - 1
+        self._snapshot = (hours, minutes)
 
     def incr_minute(self):
         """
         Cyclic minute increment.
         """
 
-        if self._minutes == self.MAX_MINUTES:
-            self._minutes = self.MIN_MINUTES
-        else:
-            self._minutes += 1
+        hours, minutes = self._snapshot
+        minutes = self.MIN_MINUTES if minutes == self.MAX_MINUTES \
+            else minutes + 1
+        self._snapshot = (hours, minutes)
 
     def decr_minute(self):
         """
         Cyclic minute decrement.
         """
 
-        if self._minutes == self.MIN_MINUTES:
-            self._minutes = self.MAX_MINUTES
-        else:
-            self._minutes -= 1
+        hours, minutes = self._snapshot
+        minutes = self.MAX_MINUTES if minutes == self.MIN_MINUTES \
+            else minutes - 1
+        self._snapshot = (hours, minutes)
 
     def pull(self):
         """
-        Fetch the time from the Real Time Clock module.
+        Fetch the time from the cached Real Time Clock snapshot.
         """
 
-        datetime = self._rtc.get_time()
+        datetime = self._clock.now()
 
-        self._hours = datetime.hours
-        self._minutes = datetime.minutes
+        self._snapshot = (datetime.hours, datetime.minutes)
 
     def push(self):
         """
@@ -558,27 +652,33 @@ class MxTime(MxNumeric):
 
         datetime = self._rtc.get_time()
 
-        datetime.hours = self._hours
-        datetime.minutes = self._minutes
+        datetime.hours, datetime.minutes = self._snapshot
         datetime.seconds = 0
 
-        self._rtc.set_time(datetime)
+        self._clock.set_time(datetime)
 
     def render_setting(self, x_shift=0, pre_clear=True, redraw=True):
         """
         This is intended for rendering during time setting.
         """
 
+        hours, minutes = self._snapshot
+
         if pre_clear:
             self._matrix.fill(0)
 
-        self._render_2_digit_num(self._hours, x_shift)
+        self._render_2_digit_num(hours, x_shift)
         self._render_time_delimiter(x_shift)
-        self._render_2_digit_num(self._minutes, x_shift + self.MINUTES_X_SHIFT)
+        self._render_2_digit_num(minutes, x_shift + self.MINUTES_X_SHIFT)
 
         if redraw:
             self._matrix.redraw_twice()
 
+    def state(self):
+        self.pull()
+
+        return self._snapshot
+
     def render(self, x_shift=0, pre_clear=True, redraw=True):
         """
         This method pulls the actual time from the RTC module before rendering.
@@ -599,15 +699,20 @@ class MxTemperature(MxNumeric):
     def __init__(self) -> None:
         super().__init__()
         
-        self._rtc = rtc
+        self._thermometer = hw.thermometer
         self.pull()
 
     def pull(self):
         """
-        Fetch the temperature from the Real Time Clock module's sensor.
+        Fetch the cached temperature of the Real Time Clock module's sensor.
         """
 
-        self._temperature = self._rtc.get_temperature()
+        self._temperature = self._thermometer.get_smoothed()
+
+    def state(self):
+        self.pull()
+
+        return int(self._temperature)
 
     def render(self, x_shift=0, pre_clear=True, redraw=True):
         self.pull()
@@ -619,14 +724,10 @@ class MxTemperature(MxNumeric):
 
         font = mx_font.Medium()
 
-        degree = font.get("°")
-        c_char = font.get("C")
-
-        degree.x_shift(const.COLS_IN_MATRIX * 2 + x_shift)
-        c_char.x_shift(const.COLS_IN_MATRIX * 3 + x_shift)
-        
-        degree.render(self._matrix.fb)
-        c_char.render(self._matrix.fb)
+        font.get_glyph("°").render(
+            self._matrix.fb, const.COLS_IN_MATRIX * 2 + x_shift)
+        font.get_glyph("C").render(
+            self._matrix.fb, const.COLS_IN_MATRIX * 3 + x_shift)
 
         if redraw:
             self._matrix.redraw_twice()
@@ -636,17 +737,19 @@ class MxBrightness(MxRenderable):
     MIN_LVL = 0
 
     def __init__(self):
-        self._nv_mem = nv_mem
+        self._cfg_store = cfg_store
         self._matrix = display
         self.load()
 
+        self._cfg_store.subscribe(self._on_cfg_change)
+
     def set_lvl(self, lvl: int):
         if lvl > MxBrightness.MAX_LVL:
             lvl = MxBrightness.MAX_LVL
         elif lvl < MxBrightness.MIN_LVL:
             lvl = MxBrightness.MIN_LVL
-        else:
-            self._level = lvl
+
+        self._level = lvl
 
     def get_lvl(self):
         return self._level
@@ -658,12 +761,14 @@ class MxBrightness(MxRenderable):
         self.set_lvl(self._level - 1)
 
     def save(self):
-        config = self._nv_mem.get_cfg()
-        config.bright_lvl = self._level
-        self._nv_mem.save_cfg(config)
+        self._cfg_store.set("bright_lvl", self._level)
     
     def load(self):
-        self.set_lvl(self._nv_mem.get_cfg().bright_lvl)
+        self.set_lvl(self._cfg_store.get().bright_lvl)
+
+    def _on_cfg_change(self, field, value):
+        if field == "bright_lvl":
+            self.set_lvl(value)
 
     def mx_set(self):
         self._matrix.set_brightness(self._level)
@@ -674,26 +779,20 @@ class MxBrightness(MxRenderable):
 
         font = mx_font.Medium()
 
-        j_char = font.get("J")
-        a_char = font.get("A")
-        s_char = font.get("S")
-        lvl_char = font.get(str(self._level))
-
-        a_char.x_shift(const.COLS_IN_MATRIX + x_shift)
-        s_char.x_shift(const.COLS_IN_MATRIX * 2 + x_shift)
-        lvl_char.x_shift(const.COLS_IN_MATRIX * 3 + x_shift)
-
-        j_char.render(self._matrix.fb)
-        a_char.render(self._matrix.fb)
-        s_char.render(self._matrix.fb)
-        lvl_char.render(self._matrix.fb)
+        font.get_glyph("J").render(self._matrix.fb, x_shift)
+        font.get_glyph("A").render(
+            self._matrix.fb, const.COLS_IN_MATRIX + x_shift)
+        font.get_glyph("S").render(
+            self._matrix.fb, const.COLS_IN_MATRIX * 2 + x_shift)
+        font.get_glyph(str(self._level)).render(
+            self._matrix.fb, const.COLS_IN_MATRIX * 3 + x_shift)
 
         if redraw:
             self._matrix.redraw_twice()
 
 class MxUsageCfg(MxRenderable):
     def __init__(self) -> None:
-        self._nv_mem = nv_mem
+        self._cfg_store = cfg_store
         self._matrix = display
 
         self._text = ""
@@ -714,17 +813,27 @@ class MxUsageCfg(MxRenderable):
         if pre_clear:
             self._matrix.fill(0)
 
+        self.render_strip(x_shift)
+        self.render_value()
+
+        if redraw:
+            self._matrix.redraw_twice()
+
+    def render_strip(self, x_shift=0):
+        """
+        Only the text on the first line is moving during scrolling.
+        """
+
+        self._matrix.text(self._text, 0 + x_shift, 0)
+
+    def render_value(self):
         if self.use_it:
             value = "On"
         else:
             value = "Off"
 
-        self._matrix.text(self._text, 0 + x_shift, 0)
         self._matrix.text(value, 0, 8)
 
-        if redraw:
-            self._matrix.redraw_twice()
-
 @singleton
 class MxUseScoreCfg(MxUsageCfg):
     def __init__(self) -> None:
@@ -733,12 +842,10 @@ class MxUseScoreCfg(MxUsageCfg):
         self._text = "skore"
 
     def load(self):
-        self.use_it = self._nv_mem.get_cfg().use_score
+        self.use_it = self._cfg_store.get().use_score
 
     def save(self):
-        config = self._nv_mem.get_cfg()
-        config.use_score = self.use_it
-        self._nv_mem.save_cfg(config)
+        self._cfg_store.set("use_score", self.use_it)
 
 @singleton
 class MxUseDateCfg(MxUsageCfg):
@@ -748,12 +855,10 @@ class MxUseDateCfg(MxUsageCfg):
         self._text = "datum"
 
     def load(self):
-        self.use_it = self._nv_mem.get_cfg().use_date
+        self.use_it = self._cfg_store.get().use_date
 
     def save(self):
-        config = self._nv_mem.get_cfg()
-        config.use_date = self.use_it
-        self._nv_mem.save_cfg(config)
+        self._cfg_store.set("use_date", self.use_it)
 
 @singleton
 class MxUseTimeCfg(MxUsageCfg):
@@ -763,12 +868,10 @@ class MxUseTimeCfg(MxUsageCfg):
         self._text = "cas"
 
     def load(self):
-        self.use_it = self._nv_mem.get_cfg().use_time
+        self.use_it = self._cfg_store.get().use_time
 
     def save(self):
-        config = self._nv_mem.get_cfg()
-        config.use_time = self.use_it
-        self._nv_mem.save_cfg(config)
+        self._cfg_store.set("use_time", self.use_it)
 
 @singleton
 class MxUseTemperatureCfg(MxUsageCfg):
@@ -778,12 +881,10 @@ class MxUseTemperatureCfg(MxUsageCfg):
         self._text = "teplota"
 
     def load(self):
-        self.use_it = self._nv_mem.get_cfg().use_temperature
+        self.use_it = self._cfg_store.get().use_temperature
 
     def save(self):
-        config = self._nv_mem.get_cfg()
-        config.use_temperature = self.use_it
-        self._nv_mem.save_cfg(config)
+        self._cfg_store.set("use_temperature", self.use_it)
 
 @singleton
 class MxUseScrollingCfg(MxUsageCfg):
@@ -793,9 +894,7 @@ class MxUseScrollingCfg(MxUsageCfg):
         self._text = "scroll"
 
     def load(self):
-        self.use_it = self._nv_mem.get_cfg().scroll
+        self.use_it = self._cfg_store.get().scroll
 
     def save(self):
-        config = self._nv_mem.get_cfg()
-        config.scroll = self.use_it
-        self._nv_mem.save_cfg(config)
+        self._cfg_store.set("scroll", self.use_it)
@@ -0,0 +1,48 @@
+# Author: Marek Jankech
+# Copyright Marek Jankech 2022 Released under the MIT license
+
+#########################################################################
+# Native & viper implementations of the hot paths.
+# The module only compiles on MicroPython with the native emitter,
+# the modules using it import it in try/except and fall back
+# to their pure Python implementations otherwise (CPython, other ports).
+#########################################################################
+
+import micropython
+
+@micropython.viper
+def diff_row(buffer, tx_buf, tx_idx, tx_pos: int, idx_pos: int, n: int) -> bool:
+    """
+    Copy the data bytes of one row latch from the frame buffer
+    into the transfer buffer. Return True, if any of them has changed.
+    """
+
+    src = ptr8(buffer)
+    dst = ptr8(tx_buf)
+    idx = ptr8(tx_idx)
+    changed = False
+
+    for i in range(n):
+        val = src[idx[idx_pos + i]]
+        if dst[tx_pos + 2 * i] != val:
+            dst[tx_pos + 2 * i] = val
+            changed = True
+
+    return changed
+
+@micropython.viper
+def bcd2dec(bcd: int) -> int:
+    # Nibble masks & decimal base as literals, no lookups in viper
+    return ((bcd >> 4) & 0x0F) * 10 + (bcd & 0x0F)
+
+@micropython.native
+def render_lines(framebuf, hlines, vlines, x, y):
+    """
+    Draw the horizontal and vertical lines of a char at the given offset.
+    """
+
+    for line in hlines:
+        framebuf.hline(line.x + x, line.y + y, line.width, 1)
+
+    for line in vlines:
+        framebuf.vline(line.x + x, line.y + y, line.height, 1)
@@ -0,0 +1,137 @@
+# Author: Marek Jankech
+# Copyright Marek Jankech 2022 Released under the MIT license
+
+from app.decorator import singleton
+
+import uasyncio as asyncio
+import utime
+
+PRIO_INPUT = 0
+PRIO_RENDER = 1
+PRIO_BACKGROUND = 2
+
+class TaskSlice:
+    def __init__(self, scheduler, name, priority, budget_ms,
+        wait_target_ms=None):
+        """
+        Time budget and statistics of one task. The task calls
+        :func:`checkpoint` at its yield points, its slice ends there,
+        when the budget is spent or input is waiting.
+        Waits longer than the optional target are counted as missed.
+        """
+
+        self._scheduler = scheduler
+        self.name = name
+        self.priority = priority
+        self.budget_us = budget_ms * 1000
+        self.wait_target_us = None if wait_target_ms is None \
+            else wait_target_ms * 1000
+
+        self._slice_start = utime.ticks_us()
+
+        self.slices = 0
+        self.run_us = 0
+        self.max_slice_us = 0
+        self.max_wait_us = 0
+        self.missed = 0
+
+    def begin(self):
+        """
+        Start a new slice, e.g. after the task has been woken up.
+        """
+
+        self._slice_start = utime.ticks_us()
+
+    def end(self):
+        """
+        End the slice, e.g. before the task goes to sleep.
+        """
+
+        ran = utime.ticks_diff(utime.ticks_us(), self._slice_start)
+
+        self.slices += 1
+        self.run_us += ran
+        if ran > self.max_slice_us:
+            self.max_slice_us = ran
+
+    def record_wait(self, wait_us):
+        if wait_us > self.max_wait_us:
+            self.max_wait_us = wait_us
+
+        if self.wait_target_us is not None and wait_us > self.wait_target_us:
+            self.missed += 1
+
+    async def checkpoint(self):
+        """
+        Yield, if the budget of the slice is spent or a task
+        of a higher priority (input) is waiting. Input is always handled
+        before the slice of a lower priority task continues.
+        """
+
+        scheduler = self._scheduler
+        urgent = self.priority > PRIO_INPUT and scheduler.input_pending()
+
+        if not urgent and utime.ticks_diff(
+            utime.ticks_us(), self._slice_start) < self.budget_us:
+            return
+
+        self.end()
+        t_yield = utime.ticks_us()
+
+        if urgent:
+            await scheduler.wait_input_done()
+        else:
+            await asyncio.sleep_ms(0)
+
+        self.record_wait(utime.ticks_diff(utime.ticks_us(), t_yield))
+        self.begin()
+
+
+@singleton
+class Scheduler:
+    def __init__(self):
+        """
+        Priority layer over uasyncio. Tasks declare their priority
+        and time budget per slice, the input is handled before the next
+        slice of the rendering or background tasks.
+        """
+
+        self._tasks = []
+        self._input_pending = lambda: False
+        self._input_done = asyncio.Event()
+
+    def register(self, name, priority, budget_ms,
+        wait_target_ms=None) -> TaskSlice:
+        task_slice = TaskSlice(self, name, priority, budget_ms, wait_target_ms)
+        self._tasks.append(task_slice)
+
+        return task_slice
+
+    def set_input_source(self, pending):
+        """
+        The callable returns True, while there is input waiting for dispatch.
+        """
+
+        self._input_pending = pending
+
+    def input_pending(self) -> bool:
+        return self._input_pending()
+
+    async def wait_input_done(self):
+        while self._input_pending():
+            self._input_done.clear()
+            await self._input_done.wait()
+
+    def input_done(self):
+        """
+        Called by the input task, once the input is dispatched.
+        """
+
+        self._input_done.set()
+
+    def print_stats(self):
+        for task in self._tasks:
+            print("{}: prio {}, {} slices, run {} ms, max slice {} us, "
+                "max wait {} us, {} over target".format(task.name,
+                task.priority, task.slices, task.run_us // 1000,
+                task.max_slice_us, task.max_wait_us, task.missed))
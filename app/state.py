@@ -0,0 +1,85 @@
+# Author: Marek Jankech
+# Copyright Marek Jankech 2022 Released under the MIT license
+
+import uasyncio as asyncio
+
+class State:
+    def __init__(self, name, keys: dict, enter=None, exit=None, tick=None):
+        """
+        Mode of the application.
+        The keys map a button to its action. The action returns the name
+        of the next state or None to remain in this one.
+        Enter & exit are called on the transition, tick is a coroutine
+        function running for as long as the state is active.
+        """
+
+        self.name = name
+        self.keys = keys
+        self.enter = enter
+        self.exit = exit
+        self.tick = tick
+
+
+class StateMachine:
+    def __init__(self, states: dict, initial) -> None:
+        """
+        Table-driven state machine. The states with their key bindings
+        are built once, so dispatching a button is a dictionary lookup
+        in the table of the current state.
+        """
+
+        self._states = states
+        self.state = states[initial]
+        self._changed = asyncio.ThreadSafeFlag()
+        # Task running the tick of the current state
+        self.task = None
+
+        self.transitions = 0
+
+    def dispatch(self, button) -> bool:
+        """
+        Perform the action bound to the button in the current state.
+        Return False, if there is none.
+        """
+
+        action = self.state.keys.get(button)
+        if action is None:
+            return False
+
+        next_state = action()
+        if next_state is not None:
+            self.go(next_state)
+
+        return True
+
+    def go(self, name):
+        state = self._states[name]
+
+        if self.state.exit is not None:
+            self.state.exit()
+
+        self.state = state
+        self.transitions += 1
+
+        if state.enter is not None:
+            state.enter()
+
+        self._changed.set()
+
+    async def run(self):
+        """
+        Run the tick of the current state, cancel it on the transition
+        and run the tick of the next one.
+        """
+
+        if self.state.enter is not None:
+            self.state.enter()
+
+        while True:
+            tick = self.state.tick
+            self.task = asyncio.create_task(tick()) if tick is not None else None
+
+            await self._changed.wait()
+
+            if self.task is not None:
+                self.task.cancel()
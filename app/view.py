@@ -2,20 +2,156 @@
 # Copyright Marek Jankech 2022 Released under the MIT license
 
 import uasyncio as asyncio
+import framebuf
+import utime
 import app.constants as const
 from app.adt import CircularList
-from app.hw import nv_mem, display
+from app.display import Matrix
+from app.hw import cfg_store, display
+import app.hw as hw
+from app.sched import Scheduler, PRIO_RENDER
 from app.mx_data import MxRenderable, MxDate, MxTime, MxTemperature, MxUsageCfg, MxUseScoreCfg, MxUseDateCfg, MxUseTimeCfg, MxUseTemperatureCfg, MxUseScrollingCfg
 
 SPACE = 8
 
-FIVE_MILLIS = 5
-TEN_MILLIS = 10
-TWENTY_MILLIS = 20
 THIRTY_MILLIS = 30
 
 NO_VIEW = 0
 
+class ScrollStrip:
+    def __init__(self, width, height=Matrix.HEIGHT):
+        """
+        Off-screen framebuffer holding pre-rendered information
+        placed side by side. Every scroll step is then just a blit
+        of a display-wide window of the strip, no matter how expensive
+        rendering of the information is.
+        """
+
+        self._matrix = display
+
+        self._buffer = bytearray(((width + 7) // 8) * height)
+        self.fb = framebuf.FrameBuffer(
+            self._buffer, width, height, framebuf.MONO_HLSB)
+
+        self._objs = None
+        self._offsets = None
+        self._states = None
+
+        self.renders = 0
+
+    def update(self, objs, offsets):
+        """
+        Render the information into the strip at the given x offsets.
+        The strip is rendered again only when the information
+        or the value it depends on has changed.
+        """
+
+        states = [obj.state() for obj in objs]
+
+        if (objs == self._objs and offsets == self._offsets
+            and states == self._states):
+            return
+
+        self._objs = objs
+        self._offsets = offsets
+        self._states = states
+
+        self.fb.fill(0)
+        self._matrix.draw_into(self.fb)
+
+        try:
+            for obj, x_offset in zip(objs, offsets):
+                obj.render_strip(x_offset)
+        finally:
+            self._matrix.draw_into_display()
+
+        self.renders += 1
+
+    def show(self, x_shift):
+        """
+        Show the window of the strip starting at -x_shift on the display.
+        """
+
+        self._matrix.fill(0)
+        self._matrix.fb.blit(self.fb, x_shift, 0)
+
+class Scroller:
+    def __init__(self, task_slice=None):
+        """
+        Scroll timing driven by absolute deadlines. The position
+        is a function of the elapsed time and the speed, so the scroll speed
+        does not depend on how long rendering takes. When a frame is late,
+        the intermediate positions are skipped.
+        The optional task slice is ended for the sleep between the frames
+        and the pending input is handled before the next frame.
+        """
+
+        self._slice = task_slice
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.frames = 0
+        self.skipped = 0
+        self.late_frames = 0
+        self.total_late_ms = 0
+        self.max_late_ms = 0
+
+    async def scroll(self, start, stop, speed, step):
+        """
+        Call step(x_shift) for the positions from start towards stop
+        (exclusive), moving by speed pixels per second.
+        The step returns False to stop the scrolling, in that case
+        False is returned as well.
+        """
+
+        direction = -1 if stop < start else 1
+        distance = abs(stop - start)
+        t_start = utime.ticks_ms()
+        pos = 0
+
+        while pos < distance:
+            if not step(start + direction * pos):
+                return False
+            self.frames += 1
+
+            # Deadline of the next position
+            deadline = utime.ticks_add(t_start, (pos + 1) * 1000 // speed)
+            remaining = utime.ticks_diff(deadline, utime.ticks_ms())
+            if self._slice is not None:
+                self._slice.end()
+            # pass execution to other tasks in any case
+            await asyncio.sleep_ms(remaining if remaining > 0 else 0)
+            if self._slice is not None:
+                self._slice.begin()
+                await self._slice.checkpoint()
+
+            now = utime.ticks_ms()
+            late = utime.ticks_diff(now, deadline)
+            if late > 0:
+                self.late_frames += 1
+                self.total_late_ms += late
+                if late > self.max_late_ms:
+                    self.max_late_ms = late
+                if self._slice is not None:
+                    self._slice.record_wait(late * 1000)
+
+            # Position due right now
+            due = utime.ticks_diff(now, t_start) * speed // 1000
+            if due > pos + 1:
+                self.skipped += due - pos - 1
+                pos = due
+            else:
+                pos += 1
+
+        return True
+
+    def print_stats(self):
+        print("scroll: {} frames, {} positions skipped, {} late, "
+            "avg {} ms, max {} ms late".format(self.frames, self.skipped,
+            self.late_frames, self.total_late_ms // max(self.late_frames, 1),
+            self.max_late_ms))
+
+
 class BasicViewer:
     ONE_INFO_LEN = 32
     TWO_INFO = 2
@@ -23,28 +159,48 @@ class BasicViewer:
     SCROLL_MODE = 1
     ALTERNATE_MODE = 2
 
-    def __init__(self):
-        self._nv_mem = nv_mem
+    def __init__(self, score: MxRenderable = None):
+        self._cfg_store = cfg_store
         self._matrix = display
 
-        self.score = None
+        self.score = score
         self._to_render = []
+        self._strip = ScrollStrip(self.TWO_INFO * self.ONE_INFO_LEN + SPACE)
+        self._slice = Scheduler().register("basic view", PRIO_RENDER,
+            const.RENDER_SLICE_BUDGET_MS)
+        self.scroller = Scroller(self._slice)
+
+        self._cfg_changed = True
+        self._cfg_store.subscribe(self._on_cfg_change)
 
         self.load()
 
+    def _on_cfg_change(self, field, value):
+        if field != "bright_lvl":
+            self._cfg_changed = True
+
     def load(self):
-        self._to_render = []
-        config = self._nv_mem.get_cfg()
-
-        if config.use_score and self.score is not None:
-            self._to_render.append(self.score)
-        if config.use_date:
-            self._to_render.append(MxDate())
-        if config.use_time:
-            self._to_render.append(MxTime())
-        if config.use_temperature:
-            self._to_render.append(MxTemperature())
-        
+        """
+        Rebuild the list of information to render,
+        only if the configuration has changed since the last load.
+        """
+
+        config = self._cfg_store.get()
+
+        if self._cfg_changed:
+            self._cfg_changed = False
+
+            self._to_render = []
+            if config.use_score and self.score is not None:
+                self._to_render.append(self.score)
+            if config.use_date:
+                self._to_render.append(MxDate())
+            if config.use_time:
+                self._to_render.append(MxTime())
+            if config.use_temperature:
+                self._to_render.append(MxTemperature())
+
+        # The mode is restored also after disable()
         if config.scroll:
             self._view_mode = self.SCROLL_MODE
         else:
@@ -55,6 +211,7 @@ class BasicViewer:
 
     async def view_info(self):
         self.load()
+        self._slice.begin()
 
         if self._view_mode == self.SCROLL_MODE:
             await self._scroll()
@@ -73,8 +230,14 @@ class BasicViewer:
             circular_to_render = CircularList(self._to_render)
 
             while self._view_mode == self.ALTERNATE_MODE:
+                # Fresh time before the frame, ahead of the EEPROM flushes
+                await hw.clock.now_async()
+                await self._slice.checkpoint()
                 circular_to_render.next().render()
+
+                self._slice.end()
                 await asyncio.sleep_ms(2000)
+                self._slice.begin()
 
     async def _scroll(self):
         """
@@ -103,13 +266,12 @@ class BasicViewer:
         Only one text info is displayed.
         """
 
-        for x_shift in range(self.ONE_INFO_LEN, 0, -1):
-            if self._view_mode != self.SCROLL_MODE:
-                break
-            
-            obj.render(x_shift)
+        await hw.clock.now_async()
+        await self._slice.checkpoint()
+        self._strip.update((obj,), (0,))
 
-            await asyncio.sleep_ms(TEN_MILLIS)
+        await self.scroller.scroll(self.ONE_INFO_LEN, 0,
+            const.SCROLL_IN_SPEED, self._scroll_step)
 
     async def _scroll_basic_info_2(self, obj1: MxRenderable, obj2: MxRenderable):
         """
@@ -119,18 +281,21 @@ class BasicViewer:
         ends with the second text info displayed.
         """
 
-        for x_shift in range(0, -(SPACE + self.ONE_INFO_LEN), -1):
-            if self._view_mode != self.SCROLL_MODE:
-                break
-            
-            self._matrix.fill(0)
+        await hw.clock.now_async()
+        await self._slice.checkpoint()
+        self._strip.update((obj1, obj2), (0, SPACE + self.ONE_INFO_LEN))
+
+        await self.scroller.scroll(0, -(SPACE + self.ONE_INFO_LEN),
+            const.SCROLL_SPEED, self._scroll_step)
 
-            obj1.render(x_shift, False, False)
-            obj2.render(x_shift + SPACE + self.ONE_INFO_LEN, False, False)
+    def _scroll_step(self, x_shift) -> bool:
+        if self._view_mode != self.SCROLL_MODE:
+            return False
 
-            self._matrix.redraw_twice()
+        self._strip.show(x_shift)
+        self._matrix.redraw_twice()
 
-            await asyncio.sleep_ms(FIVE_MILLIS)
+        return True
 
 
 class SettingsViewer:
@@ -144,6 +309,9 @@ class SettingsViewer:
 
     def __init__(self):
         self._matrix = display
+        self._slice = Scheduler().register("settings view", PRIO_RENDER,
+            const.RENDER_SLICE_BUDGET_MS)
+        self.scroller = Scroller(self._slice)
 
     def disable(self):
         self._view_mode = NO_VIEW
@@ -165,13 +333,20 @@ class SettingsViewer:
 
     async def _scroll_cfg(self, obj: MxUsageCfg, mode):
         self._view_mode = mode
+        self._slice.begin()
 
-        await self._scroll_cfg_1(obj, mode)
+        # The text is rendered twice into the strip, so that the end
+        # of the first copy is followed by the beginning of the second one.
+        text_width = obj.get_txt_len() * const.COLS_IN_MATRIX
+        strip = ScrollStrip(2 * text_width + SPACE, const.ROWS_IN_MATRIX)
+        strip.update((obj, obj), (0, SPACE + text_width))
+
+        await self._scroll_cfg_1(obj, mode, strip)
 
         while self._view_mode == mode:
-            await self._scroll_cfg_2(obj, mode)
+            await self._scroll_cfg_2(obj, mode, strip)
     
-    async def _scroll_cfg_1(self, obj: MxUsageCfg, mode):
+    async def _scroll_cfg_1(self, obj: MxUsageCfg, mode, strip: ScrollStrip):
         """
         This couroutine is intended to be called once at the beginning
         of text scrolling, when there was no previous text displayed.
@@ -181,15 +356,21 @@ class SettingsViewer:
         stop = -((obj.get_txt_len() - const.MATRIXES_IN_ROW 
             + self.CFG_INFO_INIT_CHAR_SHIFT) * const.COLS_IN_MATRIX)
 
-        for x_shift in range(start, stop, -1):
-            if self._view_mode != mode:
-                break
-            
-            obj.render(x_shift)
+        await self.scroller.scroll(start, stop, const.CFG_SCROLL_SPEED,
+            lambda x_shift: self._scroll_cfg_step(obj, mode, strip, x_shift))
+
+    def _scroll_cfg_step(self, obj: MxUsageCfg, mode, strip: ScrollStrip,
+        x_shift) -> bool:
+        if self._view_mode != mode:
+            return False
+
+        strip.show(x_shift)
+        obj.render_value()
+        self._matrix.redraw_twice()
 
-            await asyncio.sleep_ms(TWENTY_MILLIS)
+        return True
 
-    async def _scroll_cfg_2(self, obj: MxUsageCfg, mode):
+    async def _scroll_cfg_2(self, obj: MxUsageCfg, mode, strip: ScrollStrip):
         """
         This couroutine is intended to be called in a cycle, 
         if the :func:`_scroll_cfg_1` was already called right before.
@@ -202,16 +383,5 @@ class SettingsViewer:
             + self.CFG_INFO_INIT_CHAR_SHIFT) * const.COLS_IN_MATRIX)
         stop = start - (SPACE + text_len * const.COLS_IN_MATRIX)
 
-        for x_shift in range(start, stop, -1):
-            if self._view_mode != mode:
-                break
-            
-            self._matrix.fill(0)
-
-            obj.render(x_shift + SPACE + text_len * const.COLS_IN_MATRIX,
-                False, False)
-            obj.render(x_shift, False, False)
-
-            self._matrix.redraw_twice()
-
-            await asyncio.sleep_ms(TWENTY_MILLIS)
+        await self.scroller.scroll(start, stop, const.CFG_SCROLL_SPEED,
+            lambda x_shift: self._scroll_cfg_step(obj, mode, strip, x_shift))
@@ -0,0 +1,109 @@
+# Author: Marek Jankech
+# Copyright Marek Jankech 2022 Released under the MIT license
+
+try:
+    import _thread
+except ImportError:
+    _thread = None
+
+class FrameWorker:
+    """
+    Transmits the frames to the display from a thread, which runs
+    on the second core of the RP2040. The frames are handed over
+    through a lock-protected double buffer: the submitted frame waits
+    in the pending buffer, the worker transmits its own copy of it.
+    Frames submitted faster than they are transmitted are coalesced.
+
+    Without threads, :func:`start` returns False and the caller keeps
+    transmitting on the first core.
+    """
+
+    def __init__(self, matrix) -> None:
+        self._matrix = matrix
+
+        self._pending = bytearray(len(matrix.buffer))
+        self._front = bytearray(len(matrix.buffer))
+        self._has_frame = False
+        self.running = False
+
+        self.submits = 0
+        self.frames = 0
+        self.coalesced = 0
+
+        if _thread is not None:
+            self._lock = _thread.allocate_lock()
+            # Locked while there is no frame to transmit
+            self._ready = _thread.allocate_lock()
+            self._ready.acquire()
+            # Locked while the thread runs
+            self._alive = _thread.allocate_lock()
+
+    def start(self) -> bool:
+        if _thread is None:
+            return False
+
+        self.running = True
+        self._alive.acquire()
+        try:
+            _thread.start_new_thread(self._run, ())
+        except (OSError, RuntimeError):
+            # The second core is already in use
+            self.running = False
+            self._alive.release()
+            return False
+
+        self._matrix.attach_worker(self, _thread.allocate_lock())
+
+        return True
+
+    def stop(self):
+        """
+        Stop the thread and wait until it ends, so the frame it may be
+        transmitting is finished before the SPI lock is dropped.
+        """
+
+        with self._lock:
+            self.running = False
+            self._wake()
+
+        with self._alive:
+            pass
+
+        self._matrix.detach_worker()
+
+    def submit(self, buffer):
+        """
+        Hand the frame over to the worker. It does not block
+        for the transmission.
+        """
+
+        with self._lock:
+            self._pending[:] = buffer
+            self.submits += 1
+
+            if self._has_frame:
+                self.coalesced += 1
+            else:
+                self._has_frame = True
+                self._wake()
+
+    def _wake(self):
+        if self._ready.locked():
+            self._ready.release()
+
+    def _run(self):
+        try:
+            while True:
+                self._ready.acquire()
+
+                with self._lock:
+                    if not self.running:
+                        return
+
+                    self._front[:] = self._pending
+                    self._has_frame = False
+
+                self._matrix.transmit(self._front)
+                self.frames += 1
+        finally:
+            self._alive.release()
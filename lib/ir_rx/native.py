@@ -0,0 +1,17 @@
+# native.py Viper implementation of the NEC edge loop.
+# Only compiles on MicroPython with the native emitter, nec.py falls back
+# to its pure Python loop otherwise.
+
+import micropython
+
+@micropython.viper
+def nec_bits(times) -> uint:
+    # Time spaces only, skip the last bit which is always 1.
+    # ticks_us wraps at 2**30, the mask gives the tick difference.
+    t = ptr32(times)
+    val = uint(0)
+    for edge in range(3, 68 - 2, 2):
+        val >>= 1
+        if ((t[edge + 1] - t[edge]) & 0x3FFFFFFF) > 1120:
+            val |= uint(1) << 31
+    return val
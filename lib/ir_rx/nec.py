@@ -8,6 +8,23 @@
 from utime import ticks_us, ticks_diff
 from ir_rx import IR_RX
 
+def nec_bits_py(times):
+    # Time spaces only (marks are always 562.5µs)
+    # Space is 1.6875ms (1) or 562.5µs (0)
+    # Skip last bit which is always 1
+    val = 0
+    for edge in range(3, 68 - 2, 2):
+        val >>= 1
+        if ticks_diff(times[edge + 1], times[edge]) > 1120:
+            val |= 0x80000000
+    return val
+
+# Viper edge loop, if the port has the native emitter
+try:
+    from ir_rx.native import nec_bits
+except (ImportError, SyntaxError):
+    nec_bits = nec_bits_py
+
 class NEC_ABC(IR_RX):
     def __init__(self, pin, extended, callback, *args):
         # Block lasts <= 80ms (extended mode) and has 68 edges
@@ -26,14 +43,7 @@ class NEC_ABC(IR_RX):
             if width > 3000:  # 4.5ms space for normal data
                 if self.edge < 68:  # Haven't received the correct number of edges
                     raise RuntimeError(self.BADBLOCK)
-                # Time spaces only (marks are always 562.5µs)
-                # Space is 1.6875ms (1) or 562.5µs (0)
-                # Skip last bit which is always 1
-                val = 0
-                for edge in range(3, 68 - 2, 2):
-                    val >>= 1
-                    if ticks_diff(self._times[edge + 1], self._times[edge]) > 1120:
-                        val |= 0x80000000
+                val = nec_bits(self._times)
             elif width > 1700: # 2.5ms space for a repeat code. Should have exactly 4 edges.
                 raise RuntimeError(self.REPEAT if self.edge == 4 else self.BADREP)  # Treat REPEAT as error.
             else:
@@ -0,0 +1,12 @@
+# The app runs on MicroPython, the host tests use the stand-ins
+# of its modules from tests/stubs.
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (os.path.join(ROOT, "tests", "stubs"), ROOT,
+    os.path.join(ROOT, "lib")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
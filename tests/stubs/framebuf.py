@@ -0,0 +1,52 @@
+# Host stand-in for the MicroPython framebuf module, MONO_HLSB only.
+
+MONO_HLSB = 3
+
+
+class FrameBuffer:
+    def __init__(self, buf, width, height, fmt):
+        self.buf = buf
+        self.width = width
+        self.height = height
+        self._stride = (width + 7) // 8
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None if c is None else None
+        idx = y * self._stride + (x >> 3)
+        mask = 0x80 >> (x & 7)
+        if c is None:
+            return 1 if self.buf[idx] & mask else 0
+        if c:
+            self.buf[idx] |= mask
+        else:
+            self.buf[idx] &= ~mask & 0xFF
+
+    def fill(self, c):
+        val = 0xFF if c else 0
+        for i in range(len(self.buf)):
+            self.buf[i] = val
+
+    def hline(self, x, y, w, c):
+        for i in range(x, x + w):
+            self.pixel(i, y, c)
+
+    def vline(self, x, y, h, c):
+        for j in range(y, y + h):
+            self.pixel(x, j, c)
+
+    def fill_rect(self, x, y, w, h, c):
+        for j in range(y, y + h):
+            self.hline(x, j, w, c)
+
+    def text(self, s, x, y, c=1):
+        # No font here, every char is drawn as its box outline
+        for i in range(len(s)):
+            self.hline(x + 8 * i, y, 8, c)
+
+    def blit(self, fbuf, x, y, key=-1):
+        for j in range(fbuf.height):
+            for i in range(fbuf.width):
+                c = fbuf.pixel(i, j)
+                if c != key:
+                    self.pixel(x + i, y + j, c)
@@ -0,0 +1,111 @@
+# Host stand-in for the MicroPython machine module.
+# The I2C bus simulates the DS3231 RTC and the AT24C32 EEPROM.
+
+DS3231_ADDR = 0x68
+AT24C32_ADDR = 0x57
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode=None, pull=None):
+        self.id = id
+        self.mode = mode
+        self._value = 0
+        self.handler = None
+
+    def value(self, val=None):
+        if val is None:
+            return self._value
+        self._value = val
+
+    def toggle(self):
+        self._value ^= 1
+
+    def irq(self, handler=None, trigger=None, hard=False):
+        self.handler = handler
+
+    def fire(self):
+        """
+        Run the IRQ handler as the edge on the pin would.
+        """
+
+        if self.handler is not None:
+            self.handler(self)
+
+
+class SPI:
+    def __init__(self, id, **kwargs):
+        self.id = id
+        self.writes = []
+
+    def write(self, buf):
+        self.writes.append(bytes(buf))
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1):
+        self.callback = None
+
+    def init(self, period=0, mode=ONE_SHOT, callback=None):
+        self.callback = callback
+
+    def deinit(self):
+        self.callback = None
+
+
+class _Device:
+    def __init__(self, size, addrsize, fill=0):
+        self.mem = bytearray([fill]) * size
+        self.addrsize = addrsize
+
+
+class I2C:
+    def __init__(self, id, **kwargs):
+        self.id = id
+        self.devices = {
+            DS3231_ADDR: _Device(0x13, 8),
+            AT24C32_ADDR: _Device(4096, 16, 0xFF),
+        }
+        # 2024-01-01 12:00:00, Monday
+        self.devices[DS3231_ADDR].mem[0:7] = bytes(
+            (0x00, 0x00, 0x12, 0x01, 0x01, 0x01, 0x24))
+        # Transactions per device address
+        self.transactions = {}
+
+    def _device(self, addr):
+        self.transactions[addr] = self.transactions.get(addr, 0) + 1
+        device = self.devices.get(addr)
+        if device is None:
+            raise OSError(5)
+        return device
+
+    def scan(self):
+        return sorted(self.devices)
+
+    def writeto(self, addr, buf):
+        self._device(addr)
+        return 1
+
+    def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+        mem = self._device(addr).mem
+        for i in range(len(buf)):
+            buf[i] = mem[(memaddr + i) % len(mem)]
+
+    def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8):
+        buf = bytearray(nbytes)
+        self.readfrom_mem_into(addr, memaddr, buf, addrsize)
+        return bytes(buf)
+
+    def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+        mem = self._device(addr).mem
+        for i in range(len(buf)):
+            mem[(memaddr + i) % len(mem)] = buf[i]
@@ -0,0 +1,90 @@
+# Host stand-in for the MicroPython uasyncio module. The events are not
+# bound to a loop, so the singletons survive more asyncio.run() calls.
+
+import asyncio as _asyncio
+from asyncio import CancelledError, TimeoutError, create_task, gather, run, \
+    new_event_loop, get_event_loop
+
+
+async def sleep_ms(ms):
+    await _asyncio.sleep(ms / 1000)
+
+
+async def sleep(s):
+    await _asyncio.sleep(s)
+
+
+async def wait_for_ms(aw, ms):
+    return await _asyncio.wait_for(aw, ms / 1000)
+
+
+class Event:
+    def __init__(self):
+        self._flag = False
+        self._waiters = []
+
+    def is_set(self):
+        return self._flag
+
+    def set(self):
+        self._flag = True
+        for fut in self._waiters:
+            if not fut.done():
+                fut.set_result(True)
+        self._waiters = []
+
+    def clear(self):
+        self._flag = False
+
+    async def wait(self):
+        if self._flag:
+            return True
+
+        fut = _asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        finally:
+            if fut in self._waiters:
+                self._waiters.remove(fut)
+        return True
+
+
+def _resolve(fut):
+    if not fut.done():
+        fut.set_result(True)
+
+
+class ThreadSafeFlag:
+    """
+    Set from an interrupt handler on the device, from another thread
+    on the host. One task waits for it and the wait clears it.
+    """
+
+    def __init__(self):
+        self._flag = False
+        self._fut = None
+
+    def set(self):
+        self._flag = True
+        fut = self._fut
+        if fut is not None:
+            fut.get_loop().call_soon_threadsafe(_resolve, fut)
+
+    def clear(self):
+        self._flag = False
+
+    async def wait(self):
+        while not self._flag:
+            fut = _asyncio.get_running_loop().create_future()
+            self._fut = fut
+            # Set before the future was published
+            if self._flag:
+                break
+            try:
+                await fut
+            finally:
+                self._fut = None
+
+        self._flag = False
+        return True
@@ -0,0 +1,29 @@
+# Host stand-in for the MicroPython utime module.
+
+import time
+
+TICKS_PERIOD = 1 << 30
+
+
+def ticks_ms():
+    return int(time.monotonic() * 1000) % TICKS_PERIOD
+
+
+def ticks_us():
+    return int(time.monotonic() * 1_000_000) % TICKS_PERIOD
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) % TICKS_PERIOD
+
+
+def ticks_diff(end, start):
+    return ((end - start + TICKS_PERIOD // 2) % TICKS_PERIOD) - TICKS_PERIOD // 2
+
+
+def sleep_ms(ms):
+    time.sleep(ms / 1000)
+
+
+def sleep_us(us):
+    time.sleep(us / 1_000_000)
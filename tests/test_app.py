@@ -0,0 +1,199 @@
+import asyncio as _asyncio
+import time
+
+import uasyncio as asyncio
+
+import app.constants as const
+from app.application import App
+from lib.ir_rx.nec import NEC_8
+
+
+def record_hooks(machine, calls):
+    def hook(kind, name, original):
+        def call():
+            calls.append((kind, name))
+            if original is not None:
+                original()
+        return call
+
+    for state in machine._states.values():
+        state.enter = hook("enter", state.name, state.enter)
+        state.exit = hook("exit", state.name, state.exit)
+
+
+def test_remote_control_goes_through_the_settings_to_exit():
+    app = App()
+    calls = []
+    record_hooks(app.machine, calls)
+    visited = []
+    cancelled = []
+
+    def push(button, repeats=0):
+        app.button_handler(button, 0, 0)
+        for _ in range(repeats):
+            app.button_handler(NEC_8.REPEAT, 0, 0)
+
+    async def settle():
+        await asyncio.sleep_ms(20)
+        visited.append(app.machine.state.name)
+
+    async def transition(button, repeats=0):
+        # The tick task of the left state must be cancelled
+        task = app.machine.task
+        push(button, repeats)
+        await settle()
+        if task is not None:
+            cancelled.append(task.cancelled())
+
+    async def scenario():
+        tasks = (asyncio.create_task(app.input_operation()),
+            asyncio.create_task(app.machine.run()))
+        await settle()
+
+        await transition(const.BUTTON_3)
+        push(const.BUTTON_UP)
+        await settle()
+        await transition(const.BUTTON_OK)
+        await transition(const.BUTTON_9)
+        await transition(const.BUTTON_OK)
+        # Held OK button
+        await transition(const.BUTTON_OK, App.HOLD_BTN_RPT_THRESHOLD)
+
+        await asyncio.wait_for_ms(app._exit_flag.wait(), 1000)
+        for task in tasks:
+            task.cancel()
+
+    asyncio.run(scenario())
+
+    assert visited == [App.BASIC, App.SCORE_CFG, App.SCORE_CFG, App.BASIC,
+        App.BRIGHTNESS, App.BASIC, App.EXIT]
+    assert cancelled == [True] * 5
+    assert calls == [("enter", App.BASIC),
+        ("exit", App.BASIC), ("enter", App.SCORE_CFG),
+        ("exit", App.SCORE_CFG), ("enter", App.BASIC),
+        ("exit", App.BASIC), ("enter", App.BRIGHTNESS),
+        ("exit", App.BRIGHTNESS), ("enter", App.BASIC),
+        ("exit", App.BASIC), ("enter", App.EXIT)]
+    assert app.machine.transitions == 5
+
+
+# States left by their tick, not by a key
+TICK_EXITS = {App.SCORE_RESET: App.BASIC, App.REVERT_SCORE: App.BASIC,
+    App.EXPORT_LOG: App.BASIC}
+
+
+def spy_actions(machine, returned):
+    def spy(name, key, action):
+        def call():
+            next_state = action()
+            returned.append((name, key, next_state))
+            return next_state
+        return call
+
+    for state in machine._states.values():
+        for key, action in state.keys.items():
+            state.keys[key] = spy(state.name, key, action)
+
+
+def time_dispatch(app, durations):
+    dispatch = app.dispatch
+
+    def timed(button, repeats):
+        t_start = time.perf_counter_ns()
+        dispatch(button, repeats)
+        durations.append((time.perf_counter_ns() - t_start) // 1000)
+
+    app.dispatch = timed
+
+
+async def fast_sleep_ms(ms):
+    # The pauses of the ticks shortened 1000 times
+    await _asyncio.sleep(ms / 1_000_000)
+
+
+def test_every_edge_of_the_state_table(monkeypatch, capsys):
+    monkeypatch.setattr(asyncio, "sleep_ms", fast_sleep_ms)
+    app = App()
+    calls = []
+    returned = []
+    durations = []
+    record_hooks(app.machine, calls)
+    spy_actions(app.machine, returned)
+    time_dispatch(app, durations)
+
+    # Every key of every state, the repeatable ones also held
+    edges = []
+    for name, state in sorted(app.machine._states.items()):
+        for key in sorted(state.keys):
+            edges.append((name, key, 0))
+            if key in App.REPEATABLE_BUTTONS:
+                edges.append((name, key, App.HOLD_BTN_RPT_THRESHOLD))
+
+    walked = set()
+    transitions = set()
+
+    async def walk():
+        tasks = (asyncio.create_task(app.input_operation()),
+            asyncio.create_task(app.machine.run()))
+        await _asyncio.sleep(0.01)
+
+        for name, key, repeats in edges:
+            app.reset_score_cnt = app.revert_score_cnt = app.exit_cnt = 0
+            app.machine.go(name)
+            del calls[:], returned[:]
+
+            # Dispatched before the tick of the state gets to run
+            app.button_handler(key, 0, 0)
+            for _ in range(repeats):
+                app.button_handler(NEC_8.REPEAT, 0, 0)
+            await _asyncio.sleep(0.02)
+
+            assert returned and returned[0][:2] == (name, key)
+            walked.add((name, key))
+
+            # A held key may go through more states, e.g. the setting chain
+            expected = []
+            final = name
+            for src, _, dst in returned:
+                if dst is None:
+                    continue
+                assert src == final
+                transitions.add((src, dst))
+                expected += [("exit", src), ("enter", dst)]
+                final = dst
+            if final in TICK_EXITS:
+                transitions.add((final, TICK_EXITS[final]))
+                expected += [("exit", final), ("enter", TICK_EXITS[final])]
+                final = TICK_EXITS[final]
+
+            assert calls == expected
+            assert app.machine.state.name == final
+
+        for task in tasks:
+            task.cancel()
+
+    asyncio.run(walk())
+
+    states = set(app.machine._states)
+    assert walked == {(name, key) for name, state
+        in app.machine._states.items() for key in state.keys}
+    # Every state is entered and left by its edges
+    assert {dst for _, dst in transitions} == states
+    assert {src for src, _ in transitions} == states - {App.EXIT}
+
+    # The state lookup alone
+    machine = app.machine
+    machine.go(App.EXIT)
+    repeat = 10_000
+    t_start = time.perf_counter_ns()
+    for _ in range(repeat):
+        machine.dispatch(const.BUTTON_UP)
+    lookup_us = (time.perf_counter_ns() - t_start) / repeat / 1000
+
+    with capsys.disabled():
+        print("\n{} dispatches: avg {:.0f} us, max {} us, "
+            "lookup {:.2f} us".format(len(durations),
+            sum(durations) / len(durations), max(durations), lookup_us))
+    assert len(durations) >= len(edges)
+    assert lookup_us < 50
+    assert max(durations) < 50_000
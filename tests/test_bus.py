@@ -0,0 +1,121 @@
+import pytest
+import uasyncio as asyncio
+from machine import I2C, AT24C32_ADDR
+
+from app.bus import I2CBus
+
+
+@pytest.fixture
+def i2c():
+    i2c = I2C(1)
+    mem = i2c.devices[AT24C32_ADDR].mem
+    for addr in range(len(mem)):
+        mem[addr] = addr & 0xFF
+    return i2c
+
+
+def transactions(i2c):
+    return i2c.transactions.get(AT24C32_ADDR, 0)
+
+
+async def queued(bus, *reads):
+    # Hold the bus, so the reads get queued
+    await bus.acquire()
+    tasks = [asyncio.create_task(bus.read_async(AT24C32_ADDR, memaddr, buf,
+        addrsize=16)) for memaddr, buf in reads]
+    await asyncio.sleep_ms(0)
+    bus.release()
+    for task in tasks:
+        await task
+
+
+def test_adjacent_reads_are_merged(i2c):
+    bus = I2CBus(i2c)
+    buf_1 = bytearray(4)
+    buf_2 = bytearray(4)
+    far = bytearray(2)
+
+    asyncio.run(queued(bus, (0, buf_1), (4, buf_2), (100, far)))
+
+    assert buf_1 == bytes(range(0, 4))
+    assert buf_2 == bytes(range(4, 8))
+    assert far == bytes((100, 101))
+    assert transactions(i2c) == 2
+    assert not bus._reads
+
+
+def test_equal_reads_are_served_separately(i2c):
+    bus = I2CBus(i2c)
+    bufs = [bytearray(4) for _ in range(3)]
+
+    asyncio.run(queued(bus, *((8, buf) for buf in bufs)))
+
+    for buf in bufs:
+        assert buf == bytes(range(8, 12))
+    assert transactions(i2c) == 1
+    assert not bus._reads
+
+
+def test_long_read_is_not_merged(i2c):
+    bus = I2CBus(i2c)
+    long_buf = bytearray(I2CBus.MAX_BURST_LEN + 8)
+    short = bytearray(4)
+
+    asyncio.run(queued(bus, (0, long_buf), (4, short)))
+
+    assert long_buf == bytes(range(len(long_buf)))
+    assert short == bytes(range(4, 8))
+    assert transactions(i2c) == 2
+    assert not bus._reads
+
+
+def test_cancelled_waiter_leaves_the_queue(i2c):
+    bus = I2CBus(i2c)
+    buf = bytearray(4)
+
+    async def cancel_queued():
+        await bus.acquire()
+        tasks = (asyncio.create_task(bus.acquire(I2CBus.PRIO_LOW)),
+            asyncio.create_task(bus.read_async(AT24C32_ADDR, 0, buf,
+                addrsize=16)))
+        await asyncio.sleep_ms(0)
+        assert len(bus._waiters) == 2
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.sleep_ms(0)
+        bus.release()
+
+    asyncio.run(cancel_queued())
+
+    assert not bus._waiters
+    assert not bus._reads
+    assert not bus._locked
+    assert transactions(i2c) == 0
+
+
+def test_cancelled_after_hand_over_passes_the_lock_on(i2c):
+    bus = I2CBus(i2c)
+    order = []
+
+    async def request(name):
+        await bus.acquire()
+        order.append(name)
+        bus.release()
+
+    async def cancel_handed_over():
+        await bus.acquire()
+        first = asyncio.create_task(bus.acquire())
+        second = asyncio.create_task(request("second"))
+        await asyncio.sleep_ms(0)
+
+        # Handed over to the first waiter, which is cancelled before it runs
+        bus.release()
+        first.cancel()
+        await second
+
+    asyncio.run(cancel_handed_over())
+
+    assert order == ["second"]
+    assert not bus._waiters
+    assert not bus._locked
@@ -0,0 +1,160 @@
+import pytest
+import utime
+from machine import I2C, Pin, DS3231_ADDR
+
+import app.constants as const
+from app.bus import I2CBus
+from app.clock import RTC, Clock
+
+
+class FakeTime:
+    def __init__(self):
+        self.ms = 1000
+
+    def ticks_ms(self):
+        return self.ms
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(utime, "ticks_ms", fake.ticks_ms)
+    return fake
+
+
+@pytest.fixture
+def i2c():
+    return I2C(1)
+
+
+@pytest.fixture
+def clock(i2c):
+    return Clock(RTC(I2CBus(i2c)))
+
+
+def rtc_reads(i2c):
+    return i2c.transactions.get(DS3231_ADDR, 0)
+
+
+def set_rtc_seconds(i2c, seconds):
+    # BCD
+    i2c.devices[DS3231_ADDR].mem[const.SECONDS_MEM_ADDR] = \
+        (seconds // 10) << 4 | seconds % 10
+
+
+def test_polling_extrapolates_seconds_between_reads(i2c, clock, fake_time):
+    set_rtc_seconds(i2c, 10)
+    assert clock.now().seconds == 10
+    reads = rtc_reads(i2c)
+
+    fake_time.ms += 5_500
+    assert clock.now().seconds == 15
+    fake_time.ms += 40_000
+    assert clock.now().seconds == 55
+
+    assert rtc_reads(i2c) == reads
+    assert clock.saved_reads == 2
+
+
+def test_polling_reads_again_when_the_minute_changes(i2c, clock, fake_time):
+    set_rtc_seconds(i2c, 50)
+    clock.now()
+    reads = rtc_reads(i2c)
+
+    set_rtc_seconds(i2c, 1)
+    fake_time.ms += 11_000
+
+    assert clock.now().seconds == 1
+    assert rtc_reads(i2c) == reads + 1
+
+
+def test_polling_reads_again_after_the_refresh_period(i2c, fake_time):
+    clock = Clock(RTC(I2CBus(i2c)), refresh_ms=2_000)
+    clock.now()
+    reads = rtc_reads(i2c)
+
+    fake_time.ms += 1_000
+    clock.now()
+    assert rtc_reads(i2c) == reads
+
+    fake_time.ms += 1_000
+    clock.now()
+    assert rtc_reads(i2c) == reads + 1
+
+
+@pytest.fixture
+def pin():
+    return Pin(const.RTC_SQW_PIN, Pin.IN, Pin.PULL_UP)
+
+
+def test_second_tick_advances_time_without_reads(i2c, clock, pin, fake_time):
+    set_rtc_seconds(i2c, 10)
+    clock.enable_tick(pin, const.RTC_TICK_SECOND)
+    assert clock.now().seconds == 10
+    reads = rtc_reads(i2c)
+
+    for seconds in range(11, 60):
+        fake_time.ms += 1_000
+        pin.fire()
+        assert clock.now().seconds == seconds
+
+    assert rtc_reads(i2c) == reads
+    assert clock.lost_ticks == 0
+
+
+def test_second_tick_reads_again_when_the_minute_changes(i2c, clock, pin,
+        fake_time):
+    set_rtc_seconds(i2c, 59)
+    clock.enable_tick(pin, const.RTC_TICK_SECOND)
+    clock.now()
+    reads = rtc_reads(i2c)
+
+    set_rtc_seconds(i2c, 0)
+    fake_time.ms += 1_000
+    pin.fire()
+
+    assert clock.now().seconds == 0
+    assert rtc_reads(i2c) == reads + 1
+
+
+def test_minute_tick_reads_only_on_the_alarm(i2c, clock, pin, fake_time):
+    set_rtc_seconds(i2c, 30)
+    clock.enable_tick(pin, const.RTC_TICK_MINUTE)
+    clock.now()
+    reads = rtc_reads(i2c)
+
+    fake_time.ms += 29_000
+    clock.now()
+    assert rtc_reads(i2c) == reads
+
+    set_rtc_seconds(i2c, 0)
+    fake_time.ms += 1_000
+    pin.fire()
+
+    assert clock.now().seconds == 0
+    # The time and the status register, the alarm flag is cleared
+    assert rtc_reads(i2c) > reads
+
+
+@pytest.mark.parametrize("tick_mode", [const.RTC_TICK_SECOND,
+    const.RTC_TICK_MINUTE])
+def test_falls_back_to_polling_when_the_tick_stops(i2c, clock, pin,
+        fake_time, tick_mode):
+    set_rtc_seconds(i2c, 10)
+    clock.enable_tick(pin, tick_mode)
+    clock.now()
+
+    # No tick comes for more than a minute
+    set_rtc_seconds(i2c, 15)
+    fake_time.ms += 65_000
+    reads = rtc_reads(i2c)
+
+    assert clock.now().seconds == 15
+    assert rtc_reads(i2c) == reads + 1
+    assert clock.lost_ticks
+
+    # Keeps polling, while the tick is lost
+    set_rtc_seconds(i2c, 20)
+    fake_time.ms += 65_000
+    assert clock.now().seconds == 20
+    assert rtc_reads(i2c) == reads + 2
@@ -0,0 +1,56 @@
+import uasyncio as asyncio
+from machine import Pin, SPI
+
+import app.constants as const
+from app.display import Matrix
+
+
+class RecordingLock:
+    """
+    SPI lock shared with the frame worker, records the SPI writes
+    done under each acquisition.
+    """
+
+    def __init__(self, spi):
+        self._spi = spi
+        self.held = []
+
+    def __enter__(self):
+        self._start = len(self._spi.writes)
+
+    def __exit__(self, *exc):
+        self.held.append(self._spi.writes[self._start:])
+
+
+class FakeWorker:
+    def __init__(self):
+        self.frames = []
+
+    def submit(self, buffer):
+        self.frames.append(bytes(buffer))
+
+
+def test_reinit_sends_the_commands_under_one_lock():
+    spi = SPI(0)
+    matrix = Matrix(spi, Pin(0, Pin.OUT), 1)
+    lock = RecordingLock(spi)
+    worker = FakeWorker()
+    matrix.attach_worker(worker, lock)
+    spi.writes.clear()
+
+    async def reinit():
+        task = asyncio.create_task(matrix.reinit_display(2))
+        await asyncio.sleep_ms(0)
+        # Sleeping without blocking the other tasks
+        assert not task.done()
+        await task
+
+    asyncio.run(reinit())
+
+    assert len(lock.held) == 1
+    assert [write[0] for write in lock.held[0]] == [const.SHUTDOWN,
+        const.SCANLIMIT, const.DECODEMODE, const.INTENSITY, const.SHUTDOWN]
+    assert lock.held[0][3][1] == 2
+    # The frame with the line is handed over to the worker
+    assert len(worker.frames) == 1
+    assert any(worker.frames[0])
@@ -0,0 +1,51 @@
+import framebuf
+
+import app.constants as const
+import app.font as font
+import app.font_src as font_src
+import app.glyphs as glyphs
+from tools.gen_glyphs import generate
+
+
+def _source_fonts():
+    yield glyphs.BIG_DIGIT, enumerate(font_src.BigDigit().digits)
+    yield glyphs.MEDIUM_DIGIT, enumerate(font_src.MediumDigit().digits)
+    yield glyphs.MEDIUM, font_src.Medium().chars.items()
+
+
+def test_generated_module_is_up_to_date():
+    with open(glyphs.__file__, encoding="utf-8") as module:
+        assert module.read() == generate()
+
+
+def test_bitmaps_match_line_rendering():
+    for bitmaps, chars in _source_fonts():
+        for key, char in chars:
+            bitmap = bytearray(len(bitmaps[key]))
+            fb = framebuf.FrameBuffer(bitmap, const.GLYPH_WIDTH,
+                const.GLYPH_HEIGHT, framebuf.MONO_HLSB)
+            char.render(fb)
+
+            assert bytes(bitmap) == bitmaps[key], key
+
+
+def test_glyph_blit_is_transparent():
+    buf = bytearray(32 * 16 // 8)
+    fb = framebuf.FrameBuffer(buf, 32, 16, framebuf.MONO_HLSB)
+    fb.pixel(31, 0, 1)
+
+    font.BigDigit().get_glyph(8).render(fb, 8)
+
+    expected = bytearray(len(buf))
+    expected_fb = framebuf.FrameBuffer(expected, 32, 16, framebuf.MONO_HLSB)
+    expected_fb.pixel(31, 0, 1)
+    font_src.BigDigit().digits[8].render(expected_fb, 8)
+
+    assert buf == expected
+
+
+def test_glyphs_are_shared():
+    medium = font.Medium()
+
+    assert medium.get_glyph("A") is medium.get_glyph("A")
+    assert font.Medium() is medium
@@ -0,0 +1,96 @@
+import pytest
+
+from app.data import Datetime, Score
+from app.journal import ScoreJournal
+
+import app.constants as const
+
+
+class FakeEEPROM:
+    def __init__(self):
+        self.mem = bytearray(b"\xff" * const.AT24C32_SIZE)
+
+    def read_into(self, addr, buf):
+        buf[:] = self.mem[addr:addr + len(buf)]
+
+    def write(self, addr, buf):
+        self.mem[addr:addr + len(buf)] = buf
+
+
+DT = Datetime(2024, 1, 1, 12, 0, 0, 1)
+SLOTS = (const.JOURNAL_END_ADDR - const.JOURNAL_START_ADDR) \
+    // ScoreJournal.RECORD_LEN
+
+
+def score_of(n):
+    return Score(n & 0xFF, (n >> 8) & 0xFF)
+
+
+def fill(nv_mem, n):
+    journal = ScoreJournal(nv_mem)
+    for i in range(n):
+        journal.append(score_of(i), DT)
+    return journal
+
+
+def assert_same_score(score, other):
+    assert (score.left, score.right) == (other.left, other.right)
+
+
+@pytest.mark.parametrize("n", [1, SLOTS - 1, SLOTS, SLOTS + 1, 1000, 32773])
+def test_reconstructs_the_head_from_the_eeprom(n):
+    nv_mem = FakeEEPROM()
+    written = fill(nv_mem, n)
+    journal = ScoreJournal(nv_mem)
+
+    assert len(journal) == len(written) == min(n, SLOTS)
+    assert journal.last_seq() == written.last_seq() \
+        == (n - 1) & ScoreJournal.SEQ_MASK
+    assert_same_score(journal.read(journal.last_seq()), score_of(n - 1))
+
+    # The next record goes to the same slot
+    journal.append(score_of(n), DT)
+    written.append(score_of(n), DT)
+    assert_same_score(ScoreJournal(nv_mem).read(journal.last_seq()),
+        score_of(n))
+
+
+def test_empty_journal():
+    journal = ScoreJournal(FakeEEPROM())
+
+    assert len(journal) == 0
+    assert journal.last_seq() is None
+    assert journal.read(0) is None
+
+
+@pytest.mark.parametrize("n", [5, SLOTS + 1, 32773])
+def test_read_stops_at_the_oldest_record(n):
+    journal = fill(FakeEEPROM(), n)
+    last_seq = journal.last_seq()
+
+    for back in range(len(journal)):
+        seq = (last_seq - back) & ScoreJournal.SEQ_MASK
+        assert_same_score(journal.read(seq), score_of(n - 1 - back))
+
+    oldest_seq = (last_seq - len(journal) + 1) & ScoreJournal.SEQ_MASK
+    assert journal.read((oldest_seq - 1) & ScoreJournal.SEQ_MASK) is None
+
+
+@pytest.mark.parametrize("n", [5, SLOTS + 1])
+def test_revert_past_the_oldest_record(n):
+    # Same as MxScore.revert(), the reverted score is appended
+    journal = fill(FakeEEPROM(), n)
+    seq = journal.last_seq()
+    reverted = []
+
+    while True:
+        seq = (seq - 1) & ScoreJournal.SEQ_MASK
+        score = journal.read(seq)
+        if score is None:
+            break
+        reverted.append((score.left, score.right))
+        journal.append(score, DT)
+
+    assert reverted
+    assert reverted == [(s.left, s.right)
+        for s in map(score_of, range(n - 2, n - 2 - len(reverted), -1))]
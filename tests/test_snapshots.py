@@ -0,0 +1,92 @@
+import asyncio as _asyncio
+import threading
+import time
+
+import pytest
+import uasyncio as asyncio
+
+import app.constants as const
+import app.hw as hw
+from app.application import App
+
+
+@pytest.fixture
+def app():
+    app = App()
+    saved_score = app.mx_score.state()
+    saved_date = app.mx_date._snapshot
+    saved_time = app.mx_time._snapshot
+    saved_dt = hw.rtc.get_time()
+
+    yield app
+
+    app.mx_score.set_score(saved_score[0], saved_score[1])
+    app.mx_score.save()
+    app.mx_date._snapshot = saved_date
+    app.mx_time._snapshot = saved_time
+    hw.clock.set_time(saved_dt)
+
+
+def keys(first, up=0, down=0, confirm=const.BUTTON_OK):
+    return ([first] if first is not None else []) \
+        + [const.BUTTON_UP] * up + [const.BUTTON_DOWN] * down + [confirm]
+
+
+def test_button_events_while_rendering_are_never_lost(app, monkeypatch):
+    # The debounce drops fast pushes on purpose, every push counts here
+    monkeypatch.setattr(app, "exec_not_too_fast",
+        lambda change: change() or True)
+    app.mx_score.set_score(0, 0)
+    day, month, year = app.mx_date.state()
+    hours, _ = app.mx_time.state()
+
+    events = (keys(const.BUTTON_LEFT, up=37, down=5)
+        + keys(const.BUTTON_RIGHT, up=23, down=11)
+        # Day, month, year, hour and minute
+        + keys(const.BUTTON_8, up=5) + keys(None, up=3) + keys(None, up=2)
+        + keys(None, up=3) + keys(None, up=7))
+
+    def remote():
+        # The IR callback, paced only by the free space in the queue
+        for button in events:
+            while len(app.input_queue) >= const.INPUT_QUEUE_LEN - 2:
+                time.sleep(0.0001)
+            app.button_handler(button, 0, 0)
+
+    rendered = [0]
+
+    async def render():
+        # The renderers read the snapshots, the receiver stays live
+        while True:
+            app.mx_score.render(redraw=False)
+            app.mx_date.render_setting()
+            app.mx_time.render_setting(redraw=False)
+            rendered[0] += 1
+            await _asyncio.sleep(0)
+
+    async def stress():
+        tasks = (asyncio.create_task(app.input_operation()),
+            asyncio.create_task(app.machine.run()),
+            asyncio.create_task(render()))
+        thread = threading.Thread(target=remote)
+        thread.start()
+
+        t_end = time.monotonic() + 10
+        while thread.is_alive() or len(app.input_queue):
+            assert time.monotonic() < t_end
+            await _asyncio.sleep(0.001)
+        thread.join()
+        await _asyncio.sleep(0.01)
+
+        for task in tasks:
+            task.cancel()
+
+    asyncio.run(stress())
+
+    assert app.input_queue.dropped == 0
+    assert rendered[0] > 1
+    assert app.machine.state.name == App.BASIC
+
+    assert app.mx_score.state()[:2] == (37 - 5, 23 - 11)
+    assert app.mx_date.state() == (day + 5, month + 3, year + 2)
+    assert app.mx_time.state() == (hours + 3, 7)
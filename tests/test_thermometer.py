@@ -0,0 +1,38 @@
+import uasyncio as asyncio
+from machine import I2C, DS3231_ADDR
+
+import app.constants as const
+from app.bus import I2CBus
+from app.clock import RTC, Thermometer
+
+
+def set_rtc_temperature(i2c, degrees):
+    mem = i2c.devices[DS3231_ADDR].mem
+    mem[const.TMPRTR_REG] = degrees
+    mem[const.TMPRTR_REG + 1] = 0
+
+
+def test_get_returns_the_cached_value_only():
+    i2c = I2C(1)
+    set_rtc_temperature(i2c, 21)
+    thermometer = Thermometer(RTC(I2CBus(i2c)))
+    reads = i2c.transactions[DS3231_ADDR]
+
+    set_rtc_temperature(i2c, 25)
+    for _ in range(10):
+        assert thermometer.get() == 21
+        assert thermometer.get_smoothed() == 21
+
+    assert i2c.transactions[DS3231_ADDR] == reads
+
+
+def test_convert_refreshes_the_cached_value():
+    i2c = I2C(1)
+    set_rtc_temperature(i2c, 21)
+    thermometer = Thermometer(RTC(I2CBus(i2c)))
+
+    set_rtc_temperature(i2c, 25)
+    asyncio.run(thermometer.convert())
+
+    assert thermometer.get() == 25
+    assert thermometer.get_smoothed() == 23
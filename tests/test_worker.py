@@ -0,0 +1,72 @@
+import time
+
+from machine import Pin, SPI
+
+import app.worker
+from app.bench import CountingSPI, NullPin
+from app.display import Matrix
+from app.worker import FrameWorker
+
+
+def wait_until(condition, timeout_s=2):
+    t_end = time.monotonic() + timeout_s
+    while not condition():
+        assert time.monotonic() < t_end
+        time.sleep(0.001)
+
+
+def test_worker_transmits_the_last_of_a_burst():
+    spi = CountingSPI()
+    matrix = Matrix(spi, NullPin(), 1)
+    worker = FrameWorker(matrix)
+    assert worker.start()
+    frames = [bytes([n]) * len(matrix.buffer) for n in (0x11, 0x22, 0x33, 0x44)]
+
+    # Hold the SPI, so the worker gets stuck in the first transmission
+    spi_lock = matrix._spi_lock
+    spi_lock.acquire()
+    worker.submit(frames[0])
+    wait_until(lambda: not worker._has_frame)
+    for frame in frames[1:]:
+        worker.submit(frame)
+    spi_lock.release()
+
+    wait_until(lambda: worker.frames == 2)
+    worker.stop()
+
+    assert worker.submits == 4
+    assert worker.coalesced == 2
+    assert spi.writes > 0
+    # The rows latched into the chain are those of the last frame
+    expected = Matrix(CountingSPI(), NullPin(), 1)
+    expected.transmit(frames[-1])
+    assert matrix._tx_buf == expected._tx_buf
+
+
+def test_stop_ends_the_thread():
+    matrix = Matrix(SPI(0), Pin(0, Pin.OUT), 1)
+    worker = FrameWorker(matrix)
+    assert worker.start()
+    assert matrix._worker is worker
+
+    worker.stop()
+
+    assert not worker._alive.locked()
+    assert not worker.running
+    assert matrix._worker is None
+    assert matrix._spi_lock is None
+
+    # The frames are transmitted on the first core again
+    frames = worker.frames
+    matrix.redraw_twice()
+    assert worker.frames == frames
+
+
+def test_start_fails_without_threads(monkeypatch):
+    monkeypatch.setattr(app.worker, "_thread", None)
+    matrix = Matrix(SPI(0), Pin(0, Pin.OUT), 1)
+    worker = FrameWorker(matrix)
+
+    assert not worker.start()
+    assert not worker.running
+    assert matrix._worker is None
@@ -0,0 +1,50 @@
+# Author: Marek Jankech
+# Copyright Marek Jankech 2022 Released under the MIT license
+
+#########################################################################
+# Compiles the fonts defined by lines in app/font_src.py into MONO_HLSB
+# bitmaps and writes them to app/glyphs.py. Run it on the host
+# from the repository root after changing a font:
+#   python3 tools/gen_glyphs.py
+#########################################################################
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app.constants as const
+import app.font_src as font_src
+
+OUT_PATH = os.path.join(ROOT, "app", "glyphs.py")
+
+HEADER = """# Generated by tools/gen_glyphs.py from app/font_src.py, do not edit.
+# Glyphs {}x{} points, MONO_HLSB bitmaps.
+"""
+
+def rasterise(char) -> bytes:
+	return bytes(char.rasterise(const.GLYPH_WIDTH, const.GLYPH_HEIGHT))
+
+def generate() -> str:
+	lines = [HEADER.format(const.GLYPH_WIDTH, const.GLYPH_HEIGHT)]
+
+	for name, chars in (
+		("BIG_DIGIT", font_src.BigDigit().digits),
+		("MEDIUM_DIGIT", font_src.MediumDigit().digits)):
+		lines.append("{} = (".format(name))
+		for char in chars:
+			lines.append("\t{!r},".format(rasterise(char)))
+		lines.append(")\n")
+
+	lines.append("MEDIUM = {")
+	for key, char in font_src.Medium().chars.items():
+		lines.append("\t{!r}: {!r},".format(key, rasterise(char)))
+	lines.append("}")
+
+	return "\n".join(lines) + "\n"
+
+if __name__ == "__main__":
+	with open(OUT_PATH, "w", encoding="utf-8") as out:
+		out.write(generate())
+	print("Written " + OUT_PATH)